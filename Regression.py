@@ -1,13 +1,20 @@
+import threading
 import numpy as np
+from scipy import linalg
 from sklearn.linear_model import LinearRegression
+from sklearn.metrics import r2_score
 from sklearn.preprocessing import PolynomialFeatures
-from typing import Any
-from functools import cache
+from typing import Any, Iterator, Optional
+from cache import MemoryCache
+from metrics import BEST_MODEL_SECONDS
+from math import comb
+from collections import deque
+from itertools import islice
+from concurrent.futures import Future, ThreadPoolExecutor
 
 
 class Prep:
-    @cache
-    def prepx(self, x: tuple, degree: int, include_bias: bool = False):
+    def prepx(self, x: Any, degree: int, include_bias: bool = False):
         if len(np.array(x).shape) == 1:
             x = np.array(x).reshape((-1, 1)).tolist()
         transformer = PolynomialFeatures(
@@ -16,14 +23,43 @@ class Prep:
 
 
 class Predictor(Prep):
-    def __init__(self, model: LinearRegression, degree: int) -> None:
+    def __init__(self, model: LinearRegression, degree: int, cache_size: int = 256) -> None:
         self.model: LinearRegression = model
         self.degree: int = degree
+        self.cache: MemoryCache = MemoryCache(
+            ttl=float("inf"), max_size=cache_size)
 
-    @cache
     def predict(self, x: tuple) -> np.ndarray:
-        x_ = self.prepx(x, self.degree)
-        return self.model.predict(x_)
+        try:
+            result: Optional[np.ndarray] = self.cache.get(x)
+        except TypeError:
+            # unhashable input (list, ndarray): nothing to cache on
+            return self.predict_many(x)
+        if result is None:
+            result = self.predict_many(x)
+            self.cache.set(x, result)
+        return result
+
+    def predict_many(self, rows: Any) -> np.ndarray:
+        """
+        Transform and score every row in a single vectorized call, bypassing the cache
+        """
+        return self.model.predict(self.prepx(rows, self.degree))
+
+    def cache_info(self) -> dict[str, Any]:
+        return self.cache.stats()
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"degree": self.degree, "coef": np.asarray(self.model.coef_).tolist(),
+                "intercept": float(self.model.intercept_)}
+
+    @classmethod
+    def from_dict(cls, state: dict[str, Any]) -> "Predictor":
+        model: LinearRegression = LinearRegression()
+        model.coef_ = np.array(state["coef"], dtype=float)
+        model.intercept_ = state["intercept"]
+        model.n_features_in_ = len(model.coef_)
+        return cls(model, state["degree"])
 
 
 class Model:
@@ -35,6 +71,25 @@ class Model:
         self.score: float = float(self.model.score(self.x, y))
 
 
+def select_degree(scored: Iterator[tuple[int, float]]) -> int:
+    """
+    Pick a degree from (degree, score) pairs in ascending degree order
+    """
+    best_degree, best_score = next(scored)
+    for degree, score in scored:
+        if score == best_score:
+            continue
+        elif score == 1:
+            break
+        elif score >= 0.95 and best_score >= 0.95:
+            # both fit well: prefer the lower score as the less overfitted model
+            if score < best_score:
+                best_degree, best_score = degree, score
+        elif score > best_score:
+            best_degree, best_score = degree, score
+    return best_degree
+
+
 class BestModel(Prep):
     def __init__(self, x: tuple, y: tuple, max_compare_length: int = 10) -> None:
         self.x: Any = x
@@ -46,26 +101,91 @@ class BestModel(Prep):
         model: LinearRegression = LinearRegression().fit(x_, self.y)
         return Model(x_, self.y, degree, model)
 
-    def compute_best_model(self) -> Predictor:
-        models = [self.get_model(i) for i in range(2, self.max_compare_length)]
-
-        best: Model = models[0]
-        for m in models[1:]:
-            if m.score == best.score:
-                continue
-            elif m.score == 1:
-                break
-            elif m.score >= 0.95 and best.score >= 0.95:
-                tmp: dict[Model, float] = {m: m.score, best: best.score}
-                best = min(tmp, key=lambda x: tmp[x])
-            else:
-                tmp = {m: m.score, best: best.score}
-                best = max(tmp, key=lambda x: tmp[x])
-        return Predictor(best.model, best.degree)
-
-
-NONE_PREDICTOR: Predictor = Predictor(
-    LinearRegression().fit(Prep().prepx((1,), 1), np.array([1])), 0)
+    def design_matrix(self) -> np.ndarray:
+        """
+        Features of the highest compared degree; PolynomialFeatures orders columns by total degree,
+        so the features of any lower degree are a leading column slice of this matrix
+        """
+        return self.prepx(self.x, self.max_compare_length - 1)
+
+    def n_columns(self, degree: int) -> int:
+        n_features: int = np.array(self.x).reshape((len(self.y), -1)).shape[1]
+        return comb(n_features + degree, degree) - 1
+
+    def score_degree(self, design: np.ndarray, degree: int) -> float:
+        # same centring, solver and cutoff as LinearRegression.fit so the scores match it exactly
+        x_: np.ndarray = design[:, :self.n_columns(degree)]
+        x_offset: np.ndarray = x_.mean(axis=0)
+        y_offset: float = self.y.mean(axis=0)
+        coef = linalg.lstsq(x_ - x_offset, self.y - y_offset,
+                            cond=getattr(LinearRegression(), "tol", None))[0]
+        intercept = y_offset - x_offset @ coef
+        return float(r2_score(self.y, x_ @ coef + intercept))
+
+    def scores(self, n_jobs: int = 1, patience: Optional[int] = None, tol: float = 1e-4) -> Iterator[tuple[int, float]]:
+        """
+        Yield (degree, score) for every compared degree. With n_jobs > 1 up to n_jobs degrees are
+        solved concurrently, in ascending order; with `patience` scoring stops once the best score
+        has not improved by `tol` for that many degrees in a row, and degrees not started yet are
+        cancelled.
+        """
+        design: np.ndarray = self.design_matrix()
+        degrees: range = range(2, self.max_compare_length)
+        scored: Iterator[tuple[int, float]] = self.solve(design, degrees, n_jobs) if n_jobs > 1 \
+            else ((d, self.score_degree(design, d)) for d in degrees)
+        best: float = -np.inf
+        stale: int = 0
+        try:
+            for degree, score in scored:
+                yield degree, score
+                if score > best + tol:
+                    best, stale = score, 0
+                else:
+                    stale += 1
+                if patience is not None and stale >= patience:
+                    return
+        finally:
+            scored.close()
+
+    def solve(self, design: np.ndarray, degrees: range, n_jobs: int) -> Iterator[tuple[int, float]]:
+        """
+        (degree, score) in degree order with at most `n_jobs` degrees submitted ahead of the consumer
+        """
+        upcoming: Iterator[int] = iter(degrees)
+        pending: deque[tuple[int, Future]] = deque()
+        with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+            try:
+                for degree in islice(upcoming, n_jobs):
+                    pending.append((degree, executor.submit(self.score_degree, design, degree)))
+                while pending:
+                    degree, future = pending.popleft()
+                    score: float = future.result()
+                    for ahead in islice(upcoming, 1):
+                        pending.append((ahead, executor.submit(self.score_degree, design, ahead)))
+                    yield degree, score
+            finally:
+                for _, future in pending:
+                    future.cancel()
+
+    def compute_best_model(self, n_jobs: int = 1, patience: Optional[int] = None) -> Predictor:
+        with BEST_MODEL_SECONDS.time():
+            degree: int = select_degree(self.scores(n_jobs=n_jobs, patience=patience))
+            return Predictor(self.get_model(degree).model, degree)
+
+
+_none_predictor_lock: threading.Lock = threading.Lock()
+
+
+def __getattr__(name: str) -> Any:
+    # the sentinel fits a model, so it is built on first access instead of at import
+    if name == "NONE_PREDICTOR":
+        with _none_predictor_lock:
+            if "NONE_PREDICTOR" not in globals():
+                globals()["NONE_PREDICTOR"] = Predictor(
+                    LinearRegression().fit(Prep().prepx((1,), 1), np.array([1])), 0)
+        return globals()["NONE_PREDICTOR"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 if __name__ == "__main__":
     xi = (5, 15, 25, 35, 45, 55)
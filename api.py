@@ -1,25 +1,103 @@
-from flask import Flask, jsonify
+from flask import Flask, g, jsonify, request
 from flask.wrappers import Response
-from github import Contributions, Statistics
+from github import (Contributions, Statistics, PredictNext, PredictTotalWeek, PredictTotalMonth, PredictTotalYear,
+                    DAY_KINDS)
+from cache import cache_from_env
+from query import STATS_QUERY
+from store import ContributionStore
+from registry import ModelRegistry
+from jobs import TrainingPool, PoolFull, imap_unordered
+from upstream import UpstreamFetcher, CircuitBreaker
+from metrics import REGISTRY, CONTENT_TYPE, Histogram
+from cohort import Cohort, check_metric
+from contribution_calendar import ContributionCalendar
+import datetime as dt
 import json
 from dotenv import load_dotenv
 import pandas as pd
 import os
+import time
+from typing import Any, Iterator, Optional, Union
 
 app: Flask = Flask(__name__)
-con_obj: Contributions = Contributions()
 VERSION: str = "v1"
 load_dotenv('.env')
+con_obj: Contributions = Contributions(
+    cache=cache_from_env(), query_builder=STATS_QUERY)
+store: Optional[ContributionStore] = None if (
+    p := os.getenv('CONTRIBUTION_STORE')) is None else ContributionStore(p)
 ENVIRONMENT: str = "Development" if (
     n := os.getenv('ENVIRONMENT')) is None else str(n)
+registry: ModelRegistry = ModelRegistry(
+    os.getenv('MODEL_REGISTRY', '.cache/models'))
+training_pool: TrainingPool = TrainingPool(
+    max_workers=int(os.getenv('TRAINING_WORKERS', 2)))
+PREDICTIONS: tuple[str, ...] = ("next", "week", "month", "year")
+MAX_BATCH: int = int(os.getenv('MAX_BATCH', 1000))
+BATCH_CONCURRENCY: int = int(os.getenv('BATCH_CONCURRENCY', 8))
+
+
+def fetch(username: str) -> dict:
+    if store is not None:
+        return store.sync(con_obj, username)
+    return con_obj.get_query(username)
+
+
+upstream: UpstreamFetcher = UpstreamFetcher(
+    fetch,
+    fresh_ttl=float(os.getenv('CACHE_TTL', 300)),
+    stale_ttl=float(os.getenv('STALE_TTL', 86400)),
+    stale_while_revalidate=os.getenv(
+        'STALE_WHILE_REVALIDATE', 'true').lower() == 'true',
+    breaker=CircuitBreaker(int(os.getenv('BREAKER_FAILURES', 5)), float(os.getenv('BREAKER_RESET', 30))))
+
+
+REQUEST_SECONDS: Histogram = REGISTRY.histogram(
+    "api_request_seconds", "Flask request latency per route", ("route", "status"))
+FETCH_SECONDS: Histogram = REGISTRY.histogram(
+    "api_fetch_seconds", "get_data: cache, store or upstream lookup of a user's payload")
+DAY_QUERY_SECONDS: Histogram = REGISTRY.histogram(
+    "api_day_query_seconds", "pandas query answering a /contributions/day/<kind> request", ("kind",))
+
+
+def cache_stats() -> dict[str, tuple[int, int]]:
+    caches: dict[str, object] = {"responses": con_obj.cache, "last_good": upstream.last_good, "models": registry}
+    return {name: (cache.hits, cache.misses) for name, cache in caches.items() if cache is not None}
+
+
+REGISTRY.gauge("cache_hits", "Lookups answered by each cache", ("cache",),
+               lambda: {(name,): hits for name, (hits, _) in cache_stats().items()})
+REGISTRY.gauge("cache_misses", "Lookups each cache could not answer", ("cache",),
+               lambda: {(name,): misses for name, (_, misses) in cache_stats().items()})
+REGISTRY.gauge("cache_hit_ratio", "hits / (hits + misses) of each cache", ("cache",),
+               lambda: {(name,): hits / (hits + misses) for name, (hits, misses) in cache_stats().items()
+                        if hits + misses})
 
 
 def get_data(username: str) -> dict:
     if ENVIRONMENT.lower() == "test":
         with open("test/data.json") as file_tmp:
             return json.load(file_tmp)
-    else:
-        return con_obj.get_query(username)
+    with FETCH_SECONDS.time():
+        return upstream.get(username)
+
+
+@app.before_request
+def start_timer() -> None:
+    g.started = time.perf_counter()
+
+
+@app.after_request
+def record_latency(response: Response) -> Response:
+    if (started := g.pop("started", None)) is not None:
+        route: str = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        REQUEST_SECONDS.observe(time.perf_counter() - started, route=route, status=str(response.status_code))
+    return response
+
+
+@app.route("/metrics")
+def prometheus_metrics() -> Response:
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
 
 
 @app.route(f"/{VERSION}")
@@ -37,6 +115,17 @@ def day_contributions(username: str, kind: str) -> Response:
         return jsonify(data)
 
     stat_obj: Statistics = Statistics(data=data)
+    return jsonify({"api_version": VERSION, "response": day_response(stat_obj, kind)})
+
+
+def day_response(stat_obj: Statistics, kind: str) -> dict:
+    if kind not in DAY_KINDS:
+        return {"error": f"kind '{kind}' is not supported"}
+    with DAY_QUERY_SECONDS.time(kind=kind):
+        return day_query(stat_obj, kind)
+
+
+def day_query(stat_obj: Statistics, kind: str) -> dict:
     response: dict
     if kind == "most":
         result: pd.DataFrame = stat_obj.most_contribution_day()
@@ -55,9 +144,141 @@ def day_contributions(username: str, kind: str) -> Response:
             "dates": (dates := result.date.to_list()),
             "total_days": len(dates)
         }
+    elif kind == "weekday":
+        result = stat_obj.most_weekday_contributions()
+        response = {"weekday": result.name,
+                    "contribution": int(result.contribution)}
     else:
-        response = {"error": f"kind '{kind}' is not supported"}
-    return jsonify({"api_version": VERSION, "response": response})
+        result = stat_obj.most_month_contributions()
+        response = {"month": result.name,
+                    "contribution": int(result.contribution)}
+    return response
+
+
+def invalid_metrics(metrics: Any) -> Optional[str]:
+    """
+    Why a request's "metrics" cannot be answered, or None when every entry is one of DAY_KINDS
+    """
+    if not isinstance(metrics, list) or not all(isinstance(m, str) for m in metrics):
+        return "metrics must be a list of strings"
+    if (unknown := [m for m in metrics if m not in DAY_KINDS]):
+        return f"kinds {unknown} are not supported"
+    return None
+
+
+def user_metrics(username: str, metrics: list[str]) -> dict:
+    try:
+        data: dict = get_data(username)
+        if "error" in data:
+            return {"username": username, "error": data["error"]}
+        stat_obj: Statistics = Statistics(data=data)
+        return {"username": username, "response": {kind: day_response(stat_obj, kind) for kind in metrics}}
+    except Exception as error:
+        return {"username": username, "error": str(error)}
+
+
+@app.route(f"/{VERSION}/batch", methods=["POST"])
+@app.route("/latest/batch", methods=["POST"])
+def batch() -> Union[Response, tuple[Response, int]]:
+    """
+    Stream one NDJSON line per user, in completion order, for {"usernames": [...], "metrics": [...]}
+    """
+    body: dict = request.get_json(silent=True) or {}
+    usernames: list = body.get("usernames") or []
+    metrics: list = body.get("metrics") or list(DAY_KINDS)
+    if not isinstance(usernames, list) or not all(isinstance(u, str) for u in usernames):
+        return jsonify({"api_version": VERSION, "response": {"error": "usernames must be a list of strings"}}), 400
+    if len(usernames) > MAX_BATCH:
+        return jsonify({"api_version": VERSION, "response": {"error": f"at most {MAX_BATCH} usernames per batch"}}), 400
+    if (error := invalid_metrics(metrics)):
+        return jsonify({"api_version": VERSION, "response": {"error": error}}), 400
+
+    def generate() -> Iterator[str]:
+        for line in imap_unordered(lambda u: user_metrics(u, metrics), usernames, BATCH_CONCURRENCY):
+            yield app.json.dumps(line) + "\n"
+    return Response(generate(), mimetype="application/x-ndjson")
+
+
+@app.route(f"/{VERSION}/cohort", methods=["POST"])
+@app.route("/latest/cohort", methods=["POST"])
+def cohort() -> Union[Response, tuple[Response, int]]:
+    """
+    Statistics of every user in {"usernames": [...], "metrics": [...]} computed together, with each
+    user's rank and percentile by "rank_by" (default "total") and the users in its "top" share
+    """
+    body: dict = request.get_json(silent=True) or {}
+    usernames: list = body.get("usernames") or []
+    metrics: list = body.get("metrics") or list(DAY_KINDS)
+    if not isinstance(usernames, list) or not all(isinstance(u, str) for u in usernames):
+        return jsonify({"api_version": VERSION, "response": {"error": "usernames must be a list of strings"}}), 400
+    if len(usernames) > MAX_BATCH:
+        return jsonify({"api_version": VERSION, "response": {"error": f"at most {MAX_BATCH} usernames per cohort"}}), 400
+    if (error := invalid_metrics(metrics)):
+        return jsonify({"api_version": VERSION, "response": {"error": error}}), 400
+    try:
+        rank_by: str = check_metric(str(body.get("rank_by", "total")))
+        top: float = float(body.get("top", 0.1))
+    except ValueError as error:
+        return jsonify({"api_version": VERSION, "response": {"error": str(error)}}), 400
+
+    def load(username: str) -> tuple[str, dict]:
+        try:
+            return username, get_data(username)
+        except Exception as error:
+            return username, {"error": str(error)}
+    fetched: dict[str, dict] = dict(imap_unordered(load, dict.fromkeys(usernames), BATCH_CONCURRENCY))
+    payloads: dict[str, dict] = {}
+    errors: list[dict] = []
+    # fetched in completion order, reported in request order
+    for username in dict.fromkeys(usernames):
+        data: dict = fetched[username]
+        if "error" in data or not (data.get("data") or {}).get("user"):
+            errors.append({"username": username, "error": data.get("error", "user not found")})
+        else:
+            payloads[username] = data
+
+    group: Cohort = Cohort.from_payloads(payloads)
+    if group.empty:
+        errors += [{"username": username, "error": "no contributions in range"} for username in group.empty]
+        order: dict[str, int] = {username: i for i, username in enumerate(dict.fromkeys(usernames))}
+        errors.sort(key=lambda error: order[error["username"]])
+    users: list[dict] = group.summary(metrics)
+    for user, rank, percentile, value in zip(users, group.rank(rank_by).tolist(),
+                                             group.percentile(rank_by).tolist(), group.metric(rank_by).tolist()):
+        user.update({"value": value, "rank": rank, "percentile": round(percentile, 2)})
+    return jsonify({"api_version": VERSION, "response": {
+        "rank_by": rank_by, "quantiles": group.quantiles(rank_by), "top": group.top(rank_by, top),
+        "users": users, "errors": errors}})
+
+
+def predict(username: str, kind: str) -> dict:
+    data: dict = get_data(username)
+    if "error" in data:
+        return data
+    now: dt.datetime = dt.datetime.now()
+    calendar: ContributionCalendar = ContributionCalendar.from_payload(data)
+    if kind == "next":
+        return PredictNext(calendar, registry=registry, username=username).predict_next()
+    elif kind == "week":
+        return PredictTotalWeek(calendar, registry=registry, username=username).predict_week(now)
+    elif kind == "month":
+        return PredictTotalMonth(calendar, registry=registry, username=username).predict_month(now.month)
+    return PredictTotalYear(calendar, registry=registry, username=username).predict()
+
+
+@app.route(f"/{VERSION}/<string:username>/predict/<string:kind>", methods=["GET"])
+@app.route("/latest/<string:username>/predict/<string:kind>", methods=["GET"])
+def predictions(username: str, kind: str) -> tuple[Response, int]:
+    if kind not in PREDICTIONS:
+        return jsonify({"api_version": VERSION, "response": {"error": f"kind '{kind}' is not supported"}}), 200
+    try:
+        job: dict = training_pool.submit(
+            f"{username.lower()}:{kind}", lambda: predict(username, kind))
+    except PoolFull as error:
+        return jsonify({"api_version": VERSION, "response": {"error": str(error)}}), 503
+    if job["status"] == "pending":
+        return jsonify({"api_version": VERSION, "response": job}), 202
+    return jsonify({"api_version": VERSION, "response": job}), 200
 
 
 # if __name__ == '__main__':
@@ -1,20 +1,137 @@
+import os
+import datetime as dt
+import pandas as pd
 import streamlit as st
 import github
+from cache import cache_from_env
+from contribution_calendar import ContributionCalendar
+from query import STATS_QUERY
+from registry import ModelRegistry
+
+# streamlit reruns this script on every interaction: everything below is memoized per username
+# (and per panel input), so a rerun only recomputes the panels whose inputs changed
+TTL: float = float(os.getenv('CACHE_TTL', 300))
+MAX_USERS: int = int(os.getenv('DASHBOARD_MAX_USERS', 64))
+FORECAST_WEEKS: int = 8
+
+
+@st.experimental_singleton
+def contributions() -> github.Contributions:
+    """
+    One client (connection pool, token budgets, response cache) shared by every session
+    """
+    return github.Contributions(cache=cache_from_env(default="sqlite"), query_builder=STATS_QUERY)
+
+
+@st.experimental_singleton
+def model_registry() -> ModelRegistry:
+    return ModelRegistry(os.getenv('MODEL_REGISTRY', '.cache/models'))
+
+
+@st.experimental_memo(ttl=TTL, max_entries=MAX_USERS, show_spinner=False)
+def fetch(username: str) -> dict:
+    data: dict = contributions().get_query(username)
+    if "error" in data:
+        return data
+    if not (data.get("data") or {}).get("user"):
+        return {"error": "; ".join(e.get("message", "") for e in data.get("errors", [])) or "user not found"}
+    return data
+
+
+@st.experimental_memo(ttl=TTL, max_entries=MAX_USERS, show_spinner=False)
+def summary(username: str) -> dict:
+    stat_obj: github.Statistics = github.Statistics(data=fetch(username))
+    most: pd.DataFrame = stat_obj.most_contribution_day()
+    return {
+        "total": stat_obj.total_contributions,
+        "per_week": stat_obj.average_contribution_per_week(),
+        "per_month": stat_obj.average_contribution_per_month(),
+        "most": int(most.contribution.max()),
+        "most_dates": most.date.dt.date.tolist(),
+        "weekday": stat_obj.weekday_contributions(),
+        "month": stat_obj.month_contributions(),
+    }
+
+
+@st.experimental_memo(ttl=TTL, max_entries=MAX_USERS, show_spinner=False)
+def calendar(username: str) -> ContributionCalendar:
+    """
+    Parsed once per user and shared by every prediction panel
+    """
+    return ContributionCalendar.from_payload(fetch(username))
+
+
+@st.experimental_memo(ttl=TTL, max_entries=MAX_USERS, show_spinner=False)
+def next_contribution(username: str, today: dt.date) -> dict:
+    return github.PredictNext(calendar(username), registry=model_registry(), username=username).predict_next()
+
+
+@st.experimental_memo(ttl=TTL, max_entries=MAX_USERS, show_spinner=False)
+def week_forecast(username: str, start: dt.date, weeks: int) -> pd.DataFrame:
+    model = github.PredictTotalWeek(calendar(username), registry=model_registry(), username=username)
+    forecast: list[dict] = model.forecast_weeks(dt.datetime.combine(start, dt.time()), weeks)
+    if "error" in forecast[0]:
+        return pd.DataFrame()
+    return pd.DataFrame({"contribution": [w["totalPredictedContribution"] for w in forecast]},
+                        index=[w["weekdate"].date() for w in forecast])
+
+
+@st.experimental_memo(ttl=TTL, max_entries=MAX_USERS, show_spinner=False)
+def month_forecast(username: str) -> pd.DataFrame:
+    model = github.PredictTotalMonth(calendar(username), registry=model_registry(), username=username)
+    forecast: list[dict] = model.forecast_months()
+    if "error" in forecast[0]:
+        return pd.DataFrame()
+    return pd.DataFrame({"contribution": [m["totalPredictedContribution"] for m in forecast]},
+                        index=pd.CategoricalIndex(github.MONTHS, categories=github.MONTHS, ordered=True))
 
-con_obj = github.Contributions()
 
 st.title("Github Analysis")
 st.write("This app gives a dashboard of your github contributions")
 
-gitname = st.sidebar.text_input(
-    label="Git Repository", placeholder="Enter github repo")
+gitname: str = st.sidebar.text_input(
+    label="Github username", placeholder="Enter github username").strip().lower()
+show_predictions: bool = st.sidebar.checkbox("Predictions")
+week_start: dt.date = st.sidebar.date_input("Forecast weeks from", dt.date.today())
 
-data = con_obj.get_query(gitname)
+if not gitname:
+    st.info("Enter a github username in the sidebar")
+    st.stop()
 
-stat_obj = github.Statistics(data=data)
+with st.spinner(f"Fetching {gitname}'s contributions"):
+    data: dict = fetch(gitname)
+if "error" in data:
+    st.error(data["error"])
+    st.stop()
 
-month_stat = stat_obj.month_contributions()
+stats: dict = summary(gitname)
+total, per_week, per_month = st.columns(3)
+total.metric("Contributions in the last year", stats["total"])
+per_week.metric("Average per week", stats["per_week"])
+per_month.metric("Average per month", stats["per_month"])
+st.write(f"Most contributions in a day: **{stats['most']}** on "
+         + ", ".join(d.isoformat() for d in stats["most_dates"]))
+
+st.write("# Weekday Contributions")
+st.bar_chart(stats["weekday"])
 
-# st.write(month_stat)
 st.write("# Monthly Contributions Bar Chart")
-st.bar_chart(month_stat)
+st.bar_chart(stats["month"])
+
+if show_predictions:
+    st.write("# Predictions")
+    with st.spinner("Training models"):
+        upcoming: dict = next_contribution(gitname, dt.date.today())
+        weeks: pd.DataFrame = week_forecast(gitname, week_start, FORECAST_WEEKS)
+        months: pd.DataFrame = month_forecast(gitname)
+    if "error" in upcoming:
+        st.warning(f"next contribution: {upcoming['error']}")
+    else:
+        st.metric("Next contribution", upcoming["date"].date().isoformat(), f"in {upcoming['days']} days")
+    if weeks.empty or months.empty:
+        st.warning("not enough contribution history to forecast")
+    else:
+        st.write(f"## Next {FORECAST_WEEKS} weeks")
+        st.bar_chart(weeks)
+        st.write(f"## Months (predicted year total {int(months.contribution.sum())})")
+        st.bar_chart(months)
@@ -0,0 +1,70 @@
+"""
+Benchmark BestModel.compute_best_model against fitting every degree with LinearRegression.
+
+    python -m benchmarks.bench_best_model
+"""
+import os
+import time
+from typing import Callable
+from Regression import BestModel
+from contribution_calendar import ContributionCalendar
+from github import PredictNext, PredictTotalWeek, PredictTotalMonth
+from benchmarks.synthetic import synthetic_payload
+
+YEARS: tuple[int, ...] = (1, 5, 10)
+MODELS: tuple[type, ...] = (PredictNext, PredictTotalWeek, PredictTotalMonth)
+
+
+def legacy_best_degree(best_model: BestModel) -> int:
+    models = [best_model.get_model(i)
+              for i in range(2, best_model.max_compare_length)]
+    best = models[0]
+    for m in models[1:]:
+        if m.score == best.score:
+            continue
+        elif m.score == 1:
+            break
+        elif m.score >= 0.95 and best.score >= 0.95:
+            best = min((m, best), key=lambda model: model.score)
+        else:
+            best = max((m, best), key=lambda model: model.score)
+    return best.degree
+
+
+def timed(func: Callable[[], int]) -> tuple[float, int]:
+    start: float = time.perf_counter()
+    degree: int = func()
+    return time.perf_counter() - start, degree
+
+
+def training_set(model: type, years: int) -> tuple[tuple, tuple]:
+    # data_prep only, without training the model
+    obj = model.__new__(model)
+    obj.last = 1
+    obj.raw_data = synthetic_payload(years=years, seed=years)
+    obj.calendar = ContributionCalendar.of(obj.raw_data)
+    return obj.data_prep()
+
+
+def main() -> None:
+    cores: int = os.cpu_count() or 1
+    print(f"{'model':>18} {'years':>5} {'rows':>5} {'legacy s':>9} {'engine s':>9} "
+          f"{f'{cores} jobs s':>9} {'patience s':>10} {'degree':>6}")
+    for model in MODELS:
+        for years in YEARS:
+            x, y = training_set(model, years)
+            legacy, expected = timed(
+                lambda: legacy_best_degree(BestModel(x, y, 20)))
+            engine, degree = timed(
+                lambda: BestModel(x, y, 20).compute_best_model().degree)
+            parallel, _ = timed(lambda: BestModel(
+                x, y, 20).compute_best_model(n_jobs=cores).degree)
+            early, _ = timed(lambda: BestModel(
+                x, y, 20).compute_best_model(patience=3).degree)
+            assert degree == expected, (model.__name__, years, degree, expected)
+            print(f"{model.__name__:>18} {years:>5} {len(y):>5} {legacy:>9.3f} {engine:>9.3f} "
+                  f"{parallel:>9.3f} {early:>10.3f} {degree:>6}")
+
+
+if __name__ == "__main__":
+    main()
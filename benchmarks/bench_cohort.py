@@ -0,0 +1,57 @@
+"""
+Benchmark the Cohort engine against building Statistics user by user, for the five
+/contributions/day/<kind> answers plus a ranking by total.
+
+    python -m benchmarks.bench_cohort
+"""
+import time
+import datetime as dt
+from api import day_response
+from cohort import Cohort
+from github import Statistics, DAY_KINDS
+from contribution_calendar import ContributionCalendar
+from benchmarks.synthetic import synthetic_payload
+
+USERS: tuple[int, ...] = (100, 1000, 5000)
+# the per-user loop is timed on at most this many users and extrapolated
+LOOP_SAMPLE: int = 200
+
+
+def per_user(payloads: dict[str, dict]) -> list[dict]:
+    rows: list[dict] = []
+    for username, payload in payloads.items():
+        stat_obj: Statistics = Statistics(payload)
+        rows.append({"username": username, "total": stat_obj.total_contributions,
+                     "response": {kind: day_response(stat_obj, kind) for kind in DAY_KINDS}})
+    rows.sort(key=lambda row: -row["total"])
+    return rows
+
+
+def vectorized(calendars: dict[str, ContributionCalendar]) -> list[dict]:
+    group: Cohort = Cohort(calendars)
+    rows: list[dict] = group.summary()
+    group.rank("total")
+    return rows
+
+
+def main() -> None:
+    end: dt.date = dt.date(2022, 5, 30)
+    print(f"{'users':>6} {'loop s':>8} {'cohort s':>9} {'speedup':>8}")
+    for n in USERS:
+        payloads: dict[str, dict] = {f"user{i}": synthetic_payload(years=1, density=0.2 + 0.6 * (i % 5) / 4,
+                                                                 seed=i, end=end) for i in range(n)}
+        sample: dict[str, dict] = dict(list(payloads.items())[:LOOP_SAMPLE])
+        start: float = time.perf_counter()
+        per_user(sample)
+        loop: float = (time.perf_counter() - start) * n / len(sample)
+
+        start = time.perf_counter()
+        calendars: dict[str, ContributionCalendar] = {
+            username: ContributionCalendar.from_payload(payload) for username, payload in payloads.items()}
+        vectorized(calendars)
+        cohort: float = time.perf_counter() - start
+        print(f"{n:>6} {loop:>8.2f} {cohort:>9.2f} {loop / cohort:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
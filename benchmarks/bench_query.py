@@ -0,0 +1,55 @@
+"""
+Compare the full and the stats-only query projections: request build time,
+response size and parse time.
+
+    python -m benchmarks.bench_query
+"""
+import json
+import timeit
+import datetime as dt
+from jinja2 import Template
+from github import Statistics
+from query import FULL_QUERY, STATS_QUERY, QueryBuilder
+from benchmarks.synthetic import synthetic_payload
+
+YEARS: tuple[int, ...] = (1, 10)
+
+
+def project(payload: dict, builder: QueryBuilder) -> dict:
+    """
+    Shape a full payload the way GitHub would answer the builder's query
+    """
+    user: dict = payload["data"]["user"]
+    calendar: dict = user["contributionsCollection"]["contributionCalendar"]
+    weeks: list[dict] = [{"contributionDays": [{f: day[f] for f in builder.day_fields} for day in week["contributionDays"]]}
+                         for week in calendar["weeks"]]
+    projected: dict = {"totalContributions": calendar["totalContributions"], "weeks": weeks}
+    if builder.month_fields:
+        projected["months"] = calendar["months"]
+    return {"data": {"user": {**{f: user[f] for f in builder.user_fields},
+                              "contributionsCollection": {"contributionCalendar": projected}}}}
+
+
+def best_of(func, number: int = 20) -> float:
+    return min(timeit.repeat(func, number=number, repeat=5)) / number
+
+
+def main() -> None:
+    start, end = dt.datetime(2021, 5, 30), dt.datetime(2022, 5, 30)
+    jinja: float = best_of(lambda: Template(FULL_QUERY.query).render(), 200)
+    builder: float = best_of(lambda: STATS_QUERY.build("emylincon", start, end), 200)
+    print(f"request build: jinja compile+render {jinja * 1e6:.1f} us, precompiled builder {builder * 1e6:.1f} us\n")
+
+    print(f"{'years':>5} {'query':>6} {'bytes':>9} {'json.loads ms':>14} {'Statistics ms':>14}")
+    for years in YEARS:
+        full: dict = synthetic_payload(years=years)
+        for name, query in (("full", FULL_QUERY), ("stats", STATS_QUERY)):
+            body: str = json.dumps(project(full, query))
+            parse: float = best_of(lambda: json.loads(body))
+            parsed: dict = json.loads(body)
+            stats: float = best_of(lambda: Statistics(parsed))
+            print(f"{years:>5} {name:>6} {len(body):>9} {parse * 1e3:>14.2f} {stats * 1e3:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
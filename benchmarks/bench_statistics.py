@@ -0,0 +1,44 @@
+"""
+Benchmark Statistics.days_contribution against the per-row builder it replaced.
+
+    python -m benchmarks.bench_statistics
+"""
+import timeit
+import pandas as pd
+from github import Statistics
+from benchmarks.synthetic import synthetic_payload
+
+YEARS: tuple[int, ...] = (1, 2, 5, 10, 15, 20)
+
+
+def legacy_days_contribution(data: dict) -> pd.DataFrame:
+    rows: list = []
+    for week in data["data"]["user"]["contributionsCollection"]["contributionCalendar"]["weeks"]:
+        for day in week["contributionDays"]:
+            rows.append(
+                {"date": day["date"], "contribution": day["contributionCount"]})
+    df: pd.DataFrame = pd.DataFrame(rows)
+    df.date = pd.to_datetime(df.date)
+    df['day'] = [df.iloc[i].date.day_name() for i in range(len(df))]
+    df['month'] = [df.iloc[i].date.month_name() for i in range(len(df))]
+    return df
+
+
+def best_of(func, repeat: int = 5) -> float:
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def main() -> None:
+    print(f"{'years':>5} {'days':>6} {'columnar ms':>12} {'us/day':>8} {'legacy ms':>10}")
+    for years in YEARS:
+        data: dict = synthetic_payload(years=years)
+        stat_obj: Statistics = Statistics(data)
+        days: int = len(stat_obj.tf_data)
+        columnar: float = best_of(stat_obj.days_contribution)
+        legacy: float = best_of(
+            lambda: legacy_days_contribution(data), repeat=1) if years <= 5 else float("nan")
+        print(f"{years:>5} {days:>6} {columnar * 1e3:>12.2f} {columnar / days * 1e6:>8.2f} {legacy * 1e3:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Offline benchmark suite: times fetch, parse, statistics, model selection and the
+/v1/<username>/contributions/day/<kind> route on synthetic calendars.
+
+    python -m benchmarks.run                       # run and store results
+    python -m benchmarks.run --save-baseline       # store the run as the baseline
+    python -m benchmarks.run --compare             # fail if a stage got slower than the baseline
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import threading
+import datetime as dt
+from typing import Callable, Optional
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+os.environ["ENVIRONMENT"] = "benchmark"
+os.environ.setdefault("CACHE_BACKEND", "none")
+
+import api  # noqa: E402
+from github import Contributions, Statistics, PredictTotalWeek, PredictTotalMonth  # noqa: E402
+from contribution_calendar import ContributionCalendar  # noqa: E402
+from Regression import BestModel  # noqa: E402
+from benchmarks.synthetic import synthetic_payload, PROFILES  # noqa: E402
+
+RESULTS_DIR: str = os.path.join(os.path.dirname(__file__), "results")
+# committed, unlike the per-run files in results/
+BASELINE: str = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+class PayloadHandler(BaseHTTPRequestHandler):
+    """
+    Answers any query for "<profile>-<years>" with that synthetic calendar
+    """
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    bodies: dict[str, bytes] = {}
+
+    def do_POST(self):
+        query: dict = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        body: bytes = self.bodies[query["variables"]["login"]]
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def measure(func: Callable[[], object], repeat: int) -> dict[str, float]:
+    samples: list[float] = []
+    for _ in range(repeat):
+        start: float = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return {"median_ms": statistics.median(samples) * 1e3, "min_ms": min(samples) * 1e3}
+
+
+def run(years: list[int], profiles: list[str], repeat: int, model_years: int) -> dict[str, dict[str, float]]:
+    server: ThreadingHTTPServer = ThreadingHTTPServer(("127.0.0.1", 0), PayloadHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url: str = f"http://127.0.0.1:{server.server_port}/graphql"
+    con: Contributions = Contributions(max_retries=0)
+    con.url = url
+    api.con_obj.url = url
+    client = api.app.test_client()
+    results: dict[str, dict[str, float]] = {}
+    try:
+        for profile in profiles:
+            for year in years:
+                name: str = f"{profile}-{year}"
+                payload: dict = synthetic_payload(years=year, density=PROFILES[profile], seed=year)
+                body: bytes = json.dumps(payload).encode()
+                PayloadHandler.bodies[name] = body
+                parsed: dict = json.loads(body)
+
+                def stage(label: str, func: Callable[[], object], times: int = repeat) -> None:
+                    results[f"{label}/{name}"] = measure(func, times)
+
+                stage("fetch", lambda: con.get_query(name))
+                stage("parse", lambda: ContributionCalendar.from_payload(json.loads(body)))
+                stage("statistics", lambda: Statistics(parsed).most_weekday_contributions())
+                if year <= model_years:
+                    for model in (PredictTotalWeek, PredictTotalMonth):
+                        obj = model.__new__(model)
+                        obj.calendar = ContributionCalendar.from_payload(parsed)
+                        x, y = obj.data_prep()
+                        stage(f"select-{model.__name__}",
+                              lambda: BestModel(x, y, 20).compute_best_model(), max(1, repeat // 2))
+
+                def request() -> None:
+                    api.upstream.last_good.clear()
+                    response = client.get(f"/v1/{name}/contributions/day/most")
+                    assert response.status_code == 200, response.data
+                stage("api", request)
+    finally:
+        server.shutdown()
+        server.server_close()
+    return results
+
+
+def compare(results: dict[str, dict[str, float]], baseline: dict[str, dict[str, float]], tolerance: float) -> bool:
+    ok: bool = True
+    print(f"\n{'stage':<40} {'baseline ms':>12} {'now ms':>10} {'ratio':>7}")
+    for key, value in results.items():
+        if key not in baseline:
+            continue
+        ratio: float = value["median_ms"] / max(baseline[key]["median_ms"], 1e-9)
+        flag: str = ""
+        if ratio > tolerance:
+            ok, flag = False, "  slower"
+        print(f"{key:<40} {baseline[key]['median_ms']:>12.2f} {value['median_ms']:>10.2f} {ratio:>7.2f}{flag}")
+    return ok
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--years", default="1,5,10,20", help="comma separated calendar lengths")
+    parser.add_argument("--profiles", default=",".join(PROFILES), help="comma separated activity profiles")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--model-years", type=int, default=10,
+                        help="longest calendar used for the model selection stages")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--compare", action="store_true", help="compare against the baseline")
+    parser.add_argument("--tolerance", type=float, default=1.25,
+                        help="slowdown ratio against the baseline that fails --compare")
+    args = parser.parse_args(argv)
+
+    results = run([int(y) for y in args.years.split(",")], args.profiles.split(","), args.repeat, args.model_years)
+    for key, value in results.items():
+        print(f"{key:<40} {value['median_ms']:>10.2f} ms")
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    record: dict = {"created": dt.datetime.now().isoformat(), "python": platform.python_version(),
+                    "machine": platform.machine(), "results": results}
+    with open(os.path.join(RESULTS_DIR, f"{dt.datetime.now():%Y%m%d-%H%M%S}.json"), "w") as file_tmp:
+        json.dump(record, file_tmp, indent=2)
+    if args.save_baseline:
+        with open(BASELINE, "w") as file_tmp:
+            json.dump(record, file_tmp, indent=2)
+    if args.compare:
+        if not os.path.exists(BASELINE):
+            print("no baseline stored, run with --save-baseline first")
+            return 1
+        with open(BASELINE) as file_tmp:
+            return 0 if compare(results, json.load(file_tmp)["results"], args.tolerance) else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,42 @@
+import datetime as dt
+import numpy as np
+
+# share of days with at least one contribution
+PROFILES: dict[str, float] = {"sparse": 0.05, "dense": 0.8}
+
+
+def synthetic_payload(years: float = 1, density: float = 0.6, seed: int = 0,
+                      end: dt.date = dt.date(2022, 5, 30)) -> dict:
+    """
+    Build a GraphQL-shaped contribution payload covering `years` years of days
+    """
+    rng = np.random.default_rng(seed)
+    total_days: int = int(round(365 * years))
+    start: dt.date = end - dt.timedelta(days=total_days - 1)
+    # calendar weeks start on Sunday
+    start -= dt.timedelta(days=(start.weekday() + 1) % 7)
+    n: int = (end - start).days + 1
+    active = rng.random(n) < density
+    counts = np.where(active, rng.poisson(4, n) + 1, 0)
+
+    weeks: list[dict] = []
+    for i in range(n):
+        date = start + dt.timedelta(days=i)
+        weekday = (date.weekday() + 1) % 7
+        if weekday == 0 or not weeks:
+            weeks.append({"contributionDays": []})
+        weeks[-1]["contributionDays"].append({
+            "weekday": weekday,
+            "date": date.isoformat(),
+            "contributionCount": int(counts[i]),
+            "color": "#ebedf0" if counts[i] == 0 else "#9be9a8",
+        })
+    return {"data": {"user": {
+        "email": "",
+        "createdAt": f"{start.isoformat()}T00:00:00Z",
+        "contributionsCollection": {"contributionCalendar": {
+            "totalContributions": int(counts.sum()),
+            "weeks": weeks,
+            "months": [],
+        }},
+    }}}
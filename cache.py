@@ -0,0 +1,152 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import datetime as dt
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+def cache_key(username: str, start: dt.datetime, end: dt.datetime, fields: str = "") -> str:
+    key: str = f"{username.lower()}:{start:%Y-%m-%d}:{end:%Y-%m-%d}"
+    return f"{key}:{fields}" if fields else key
+
+
+class Cache(ABC):
+    """
+    Response cache with per-entry TTL, bounded LRU size and hit/miss counters
+    """
+
+    def __init__(self, ttl: float = 300, max_size: int = 256) -> None:
+        self.ttl: float = ttl
+        self.max_size: int = max_size
+        self.hits: int = 0
+        self.misses: int = 0
+        self.lock: threading.Lock = threading.Lock()
+
+    @abstractmethod
+    def _get(self, key: Hashable) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    def _set(self, key: Hashable, value: Any, expires: float) -> None:
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self.lock:
+            value = self._get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        with self.lock:
+            self._set(key, value, time.time() +
+                      (self.ttl if ttl is None else ttl))
+
+    def stats(self) -> dict[str, Any]:
+        total: int = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "size": len(self),
+                "max_size": self.max_size, "hit_ratio": self.hits / total if total else 0.0}
+
+
+class MemoryCache(Cache):
+    def __init__(self, ttl: float = 300, max_size: int = 256) -> None:
+        super().__init__(ttl=ttl, max_size=max_size)
+        self.entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def _get(self, key: Hashable) -> Optional[Any]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires < time.time():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return value
+
+    def _set(self, key: Hashable, value: Any, expires: float) -> None:
+        self.entries[key] = (expires, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+
+class SQLiteCache(Cache):
+    """
+    On-disk cache so entries survive process restarts (CLI runs, streamlit reruns)
+    """
+
+    def __init__(self, path: str = ".cache/responses.sqlite", ttl: float = 300, max_size: int = 256) -> None:
+        super().__init__(ttl=ttl, max_size=max_size)
+        if (directory := os.path.dirname(path)):
+            os.makedirs(directory, exist_ok=True)
+        self.conn: sqlite3.Connection = sqlite3.connect(
+            path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT, expires REAL, accessed REAL)")
+        self.conn.commit()
+
+    def _get(self, key: str) -> Optional[Any]:
+        row = self.conn.execute(
+            "SELECT value, expires FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        now: float = time.time()
+        if row[1] < now:
+            self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.conn.commit()
+            return None
+        self.conn.execute(
+            "UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+        self.conn.commit()
+        return json.loads(row[0])
+
+    def _set(self, key: str, value: Any, expires: float) -> None:
+        self.conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                          (key, json.dumps(value), expires, time.time()))
+        self.conn.execute("""DELETE FROM responses WHERE key IN (
+            SELECT key FROM responses ORDER BY accessed DESC LIMIT -1 OFFSET ?)""", (self.max_size,))
+        self.conn.commit()
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def clear(self) -> None:
+        with self.lock:
+            self.conn.execute("DELETE FROM responses")
+            self.conn.commit()
+
+
+def cache_from_env(default: str = "memory") -> Optional[Cache]:
+    """
+    Build the cache selected by CACHE_BACKEND (memory, sqlite or none)
+    """
+    backend: str = os.getenv("CACHE_BACKEND", default).lower()
+    ttl: float = float(os.getenv("CACHE_TTL", 300))
+    max_size: int = int(os.getenv("CACHE_SIZE", 256))
+    if backend == "memory":
+        return MemoryCache(ttl=ttl, max_size=max_size)
+    if backend == "sqlite":
+        return SQLiteCache(os.getenv("CACHE_PATH", ".cache/responses.sqlite"), ttl=ttl, max_size=max_size)
+    return None
@@ -0,0 +1,88 @@
+import os
+import json
+import datetime as dt
+from typing import Iterator, Mapping
+import numpy as np
+from contribution_calendar import ContributionCalendar, INT16_MAX
+
+COUNTS_FILE: str = "counts.bin"
+INDEX_FILE: str = "index.json"
+VERSION: int = 1
+
+
+class CalendarArchive:
+    """
+    Many users' daily counts side by side in one memory-mapped file, with a JSON index of
+    (offset, start ordinal, length) per user. Calendars read from it are views into the map,
+    so pages are loaded by the OS only when a user's days are touched.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path: str = path
+        with open(os.path.join(path, INDEX_FILE)) as file_tmp:
+            meta: dict = json.load(file_tmp)
+        if meta.get("version") != VERSION:
+            raise ValueError(f"unsupported archive version {meta.get('version')}")
+        self.dtype: np.dtype = np.dtype(meta["dtype"])
+        self.index: dict[str, tuple[int, int, int]] = {
+            username: (offset, start, length) for username, (offset, start, length) in meta["users"].items()}
+        counts_path: str = os.path.join(path, COUNTS_FILE)
+        # np.memmap cannot map an empty file
+        self.counts: np.ndarray = np.memmap(counts_path, dtype=self.dtype, mode="r") \
+            if os.path.getsize(counts_path) else np.zeros(0, dtype=self.dtype)
+
+    @classmethod
+    def write(cls, path: str, calendars: Mapping[str, ContributionCalendar]) -> "CalendarArchive":
+        """
+        Write `calendars` as a new archive, replacing any archive at `path`. Days missing inside a
+        calendar count zero. To add users, rewrite with `{**dict(archive.items()), **new}`.
+        """
+        os.makedirs(path, exist_ok=True)
+        filled: dict[str, ContributionCalendar] = {
+            username.lower(): calendar.filled() for username, calendar in calendars.items()}
+        wide: bool = any(len(c) and int(c.counts.max()) > INT16_MAX for c in filled.values())
+        dtype: np.dtype = np.dtype(np.int32 if wide else np.int16)
+        users: dict[str, tuple[int, int, int]] = {}
+        offset: int = 0
+        tmp_counts: str = os.path.join(path, f"{COUNTS_FILE}.tmp")
+        with open(tmp_counts, "wb") as file_tmp:
+            for username, calendar in filled.items():
+                file_tmp.write(calendar.counts.astype(dtype, copy=False).tobytes())
+                users[username] = (offset, calendar.start, len(calendar))
+                offset += len(calendar)
+        tmp_index: str = os.path.join(path, f"{INDEX_FILE}.tmp")
+        with open(tmp_index, "w") as file_tmp:
+            json.dump({"version": VERSION, "dtype": dtype.name, "users": users}, file_tmp)
+        os.replace(tmp_counts, os.path.join(path, COUNTS_FILE))
+        os.replace(tmp_index, os.path.join(path, INDEX_FILE))
+        return cls(path)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, username: str) -> bool:
+        return username.lower() in self.index
+
+    def usernames(self) -> list[str]:
+        return list(self.index)
+
+    def get(self, username: str) -> ContributionCalendar:
+        """
+        A user's calendar as a zero-copy view into the mapped counts; KeyError for unknown users
+        """
+        offset, start, length = self.index[username.lower()]
+        return ContributionCalendar.from_counts(start, self.counts[offset:offset + length])
+
+    def window(self, username: str, start: dt.date, end: dt.date) -> ContributionCalendar:
+        """
+        Days from `start` to `end` (inclusive) of a user, still a view into the map
+        """
+        calendar: ContributionCalendar = self.get(username)
+        return calendar[max(0, start.toordinal() - calendar.start):max(0, end.toordinal() - calendar.start + 1)]
+
+    def items(self) -> Iterator[tuple[str, ContributionCalendar]]:
+        for username in self.index:
+            yield username, self.get(username)
+
+    def stats(self) -> dict[str, int]:
+        return {"users": len(self.index), "days": len(self.counts), "bytes": self.counts.nbytes}
@@ -0,0 +1,96 @@
+"""
+Incremental parser for contribution calendar responses: `contributionDays` entries are turned into
+compact arrays as the body arrives, so the JSON tree of the days is never built. Everything outside
+the `weeks` array (user fields, totals, months, rateLimit, errors) is small and parsed once at the end.
+"""
+import re
+import json
+import datetime as dt
+from array import array
+from typing import Iterable, Optional
+import numpy as np
+from contribution_calendar import ContributionCalendar, EPOCH_ORDINAL, compact_counts
+
+WEEKS_KEY: "re.Pattern[bytes]" = re.compile(rb'"weeks"\s*:\s*')
+# inside `weeks`: flat day objects and the brackets of the weeks / contributionDays arrays.
+# Day fields (date, counts, weekday, color) never hold braces or brackets.
+TOKENS: "re.Pattern[bytes]" = re.compile(rb"\{[^{}]*\}|\[|\]")
+
+
+class CalendarStreamParser:
+    """
+    Feed response chunks, then close() for (payload without days, calendar). Memory is bounded by
+    the output arrays plus one partial day object; bodies without a `weeks` array (errors) are
+    buffered up to `max_head` bytes.
+    """
+
+    def __init__(self, max_head: int = 1 << 20) -> None:
+        self.max_head: int = max_head
+        self.head: bytearray = bytearray()
+        self.tail: bytearray = bytearray()
+        self.pending: bytes = b""
+        self.state: str = "head"
+        self.depth: int = 0
+        self.size: int = 0
+        self.ordinals: array = array("i")
+        self.counts: array = array("i")
+
+    def feed(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if self.state == "head":
+            searched: int = max(0, len(self.head) - 16)
+            self.head += chunk
+            if (match := WEEKS_KEY.search(self.head, searched)) is None:
+                if len(self.head) > self.max_head:
+                    raise ValueError(f"no contribution calendar in the first {self.max_head} bytes")
+                return
+            rest: bytes = bytes(self.head[match.end():])
+            del self.head[match.end():]
+            self.state = "weeks"
+            self.scan(rest)
+        elif self.state == "weeks":
+            self.scan(chunk)
+        else:
+            self.tail += chunk
+
+    def scan(self, data: bytes) -> None:
+        buffer: bytes = self.pending + data
+        position: int = 0
+        for match in TOKENS.finditer(buffer):
+            token: bytes = match.group()
+            position = match.end()
+            if token == b"[":
+                self.depth += 1
+            elif token == b"]":
+                self.depth -= 1
+                if self.depth == 0:
+                    self.state = "tail"
+                    self.tail += buffer[position:]
+                    self.pending = b""
+                    return
+            elif self.depth == 2:
+                day: dict = json.loads(token)
+                self.ordinals.append(dt.date.fromisoformat(day["date"]).toordinal())
+                self.counts.append(day["contributionCount"])
+        self.pending = buffer[position:]
+
+    def close(self) -> tuple[dict, Optional[ContributionCalendar]]:
+        """
+        The payload with an empty `weeks` list, and the calendar (None when the body had no `weeks`)
+        """
+        if self.state == "head":
+            return json.loads(bytes(self.head)), None
+        if self.state == "weeks":
+            raise ValueError(f"response ended inside the contribution calendar after {self.size} bytes")
+        payload: dict = json.loads(bytes(self.head) + b"[]" + bytes(self.tail))
+        ordinals: np.ndarray = np.frombuffer(self.ordinals, dtype=np.int32) if self.ordinals else np.zeros(0, np.int32)
+        counts: np.ndarray = np.frombuffer(self.counts, dtype=np.int32) if self.counts else np.zeros(0, np.int32)
+        return payload, ContributionCalendar(
+            (ordinals.astype(np.int64) - EPOCH_ORDINAL).astype("datetime64[D]"), compact_counts(counts))
+
+
+def parse_chunks(chunks: Iterable[bytes], max_head: int = 1 << 20) -> tuple[dict, Optional[ContributionCalendar]]:
+    parser: CalendarStreamParser = CalendarStreamParser(max_head)
+    for chunk in chunks:
+        parser.feed(chunk)
+    return parser.close()
@@ -0,0 +1,244 @@
+import datetime as dt
+from typing import Iterable, Mapping, Optional
+import numpy as np
+from contribution_calendar import ContributionCalendar, EPOCH_ORDINAL, INT16_MAX
+from calendar_archive import CalendarArchive
+from github import WEEKDAYS, MONTHS, DAY_KINDS
+
+# one value per user, usable with rank(), percentile() and top()
+SCALAR_METRICS: tuple[str, ...] = ("total", "average", "most", "least", "active_days")
+
+
+def check_metric(name: str) -> str:
+    """
+    Normalised metric name: one of SCALAR_METRICS, a weekday or a month name
+    """
+    if name in SCALAR_METRICS:
+        return name
+    if name.title() in WEEKDAYS or name.title() in MONTHS:
+        return name.title()
+    raise ValueError(f"unknown metric '{name}', expected one of {SCALAR_METRICS}, a weekday or a month")
+
+
+class Cohort:
+    """
+    Many users' calendars stacked into one users x days count matrix on a shared day axis, so
+    every Statistics metric is computed for the whole cohort in a few vectorized passes. The axis
+    starts on a Monday and spans whole weeks; row i holds user i's days in columns lo[i]:hi[i]
+    and zeros elsewhere.
+    """
+
+    def __init__(self, calendars: Mapping[str, ContributionCalendar]) -> None:
+        filled: dict[str, ContributionCalendar] = {
+            username: calendar.filled() for username, calendar in calendars.items() if len(calendar)}
+        self.usernames: list[str] = list(filled)
+        # users whose calendar has no days: they have no row
+        self.empty: list[str] = [username for username, calendar in calendars.items() if not len(calendar)]
+        first: int = min((c.start for c in filled.values()), default=EPOCH_ORDINAL)
+        last: int = max((c.start + len(c) for c in filled.values()), default=EPOCH_ORDINAL)
+        # proleptic ordinal 1 (0001-01-01) was a Monday
+        self.start: int = first - (first - 1) % 7
+        n_days: int = -(-(last - self.start) // 7) * 7
+        wide: bool = any(len(c) and int(c.counts.max()) > INT16_MAX for c in filled.values())
+        self.counts: np.ndarray = np.zeros((len(filled), n_days), dtype=np.int32 if wide else np.int16)
+        self.lo: np.ndarray = np.zeros(len(filled), dtype=np.int64)
+        self.hi: np.ndarray = np.zeros(len(filled), dtype=np.int64)
+        for i, calendar in enumerate(filled.values()):
+            self.lo[i] = calendar.start - self.start
+            self.hi[i] = self.lo[i] + len(calendar)
+            self.counts[i, self.lo[i]:self.hi[i]] = calendar.counts
+        self.axis: ContributionCalendar = ContributionCalendar.from_counts(self.start, np.zeros(n_days, np.int8))
+        self._cache: dict[str, np.ndarray] = {}
+
+    @classmethod
+    def from_payloads(cls, payloads: Mapping[str, dict]) -> "Cohort":
+        return cls({username: ContributionCalendar.from_payload(payload) for username, payload in payloads.items()})
+
+    @classmethod
+    def from_archive(cls, archive: CalendarArchive, usernames: Optional[Iterable[str]] = None) -> "Cohort":
+        """
+        Cohort of a CalendarArchive's users (all of them by default)
+        """
+        return cls({username: archive.get(username) for username in (usernames or archive.usernames())})
+
+    def __len__(self) -> int:
+        return len(self.usernames)
+
+    def cached(self, name: str, compute) -> np.ndarray:
+        if name not in self._cache:
+            self._cache[name] = compute()
+        return self._cache[name]
+
+    @property
+    def mask(self) -> np.ndarray:
+        """
+        True where a column is one of the user's days
+        """
+        def compute() -> np.ndarray:
+            columns: np.ndarray = np.arange(self.counts.shape[1])
+            return (columns >= self.lo[:, None]) & (columns < self.hi[:, None])
+        return self.cached("mask", compute)
+
+    def days(self) -> np.ndarray:
+        return self.hi - self.lo
+
+    def total(self) -> np.ndarray:
+        return self.cached("total", lambda: self.counts.sum(axis=1, dtype=np.int64))
+
+    def average(self) -> np.ndarray:
+        """
+        Statistics.avg_contribution_day for every user
+        """
+        return self.total() / np.maximum(self.days(), 1)
+
+    def most(self) -> np.ndarray:
+        return self.cached("most", lambda: self.counts.max(axis=1).astype(np.int64))
+
+    def least(self) -> np.ndarray:
+        return self.cached("least", lambda: np.where(
+            self.mask, self.counts, np.iinfo(self.counts.dtype).max).min(axis=1).astype(np.int64))
+
+    def active_days(self) -> np.ndarray:
+        return self.cached("active_days", lambda: np.count_nonzero(self.counts, axis=1))
+
+    def dates_where(self, values: np.ndarray) -> list[list[dt.datetime]]:
+        """
+        Per user, the dates whose count equals that user's entry of `values`
+        """
+        rows, columns = np.nonzero((self.counts == values[:, None]) & self.mask)
+        ordinals: list[int] = (columns + self.start).tolist()
+        split: list[list[dt.datetime]] = [[] for _ in self.usernames]
+        for row, ordinal in zip(rows.tolist(), ordinals):
+            split[row].append(dt.datetime.fromordinal(ordinal))
+        return split
+
+    def weekday_totals(self) -> np.ndarray:
+        """
+        users x 7 sums, Monday first like WEEKDAYS
+        """
+        if not len(self):
+            return np.zeros((0, 7), dtype=np.int64)
+        return self.cached("weekday", lambda: self.counts.reshape(len(self), -1, 7).sum(axis=1, dtype=np.int64))
+
+    def week_totals(self) -> np.ndarray:
+        """
+        users x weeks sums; the axis's 7-day blocks are exactly its ISO weeks
+        """
+        if not len(self):
+            return np.zeros((0, 0), dtype=np.int64)
+        return self.cached("week", lambda: self.counts.reshape(len(self), -1, 7).sum(axis=2, dtype=np.int64))
+
+    def month_totals(self) -> np.ndarray:
+        """
+        users x 12 sums, January first like MONTHS
+        """
+        def compute() -> np.ndarray:
+            month: np.ndarray = self.axis.month
+            starts: np.ndarray = np.flatnonzero(np.r_[True, month[1:] != month[:-1]])
+            runs: np.ndarray = np.add.reduceat(self.counts, starts, axis=1, dtype=np.int64)
+            totals: np.ndarray = np.zeros((len(self), 12), dtype=np.int64)
+            np.add.at(totals.T, month[starts] - 1, runs.T)
+            return totals
+        return self.cached("month", compute) if len(self) else np.zeros((0, 12), dtype=np.int64)
+
+    def observed(self, keys: np.ndarray, n: int) -> np.ndarray:
+        """
+        users x n: whether the user has any day with each key (Statistics groups observed keys only)
+        """
+        seen: np.ndarray = np.zeros((len(self), n), dtype=bool)
+        for key in range(n):
+            columns: np.ndarray = np.flatnonzero(keys == key)
+            seen[:, key] = ((columns[None, :] >= self.lo[:, None]) & (columns[None, :] < self.hi[:, None])).any(axis=1)
+        return seen
+
+    def best(self, totals: np.ndarray, keys: np.ndarray, least: bool = False) -> np.ndarray:
+        """
+        Index of each user's highest (or lowest) observed total; ties go to the earliest key
+        """
+        seen: np.ndarray = self.observed(keys, totals.shape[1])
+        if least:
+            return np.where(seen, totals, np.iinfo(np.int64).max).argmin(axis=1)
+        return np.where(seen, totals, -1).argmax(axis=1)
+
+    def busiest_weekday(self) -> np.ndarray:
+        return self.best(self.weekday_totals(), self.axis.weekday)
+
+    def busiest_month(self) -> np.ndarray:
+        return self.best(self.month_totals(), self.axis.month - 1)
+
+    def quietest_month(self) -> np.ndarray:
+        return self.best(self.month_totals(), self.axis.month - 1, least=True)
+
+    def per_week(self) -> np.ndarray:
+        """
+        Statistics.average_contribution_per_week for every user
+        """
+        return np.round(self.total() / 52).astype(np.int64)
+
+    def per_month(self) -> np.ndarray:
+        return np.round(self.total() / 12).astype(np.int64)
+
+    def metric(self, name: str) -> np.ndarray:
+        """
+        One value per user: a SCALAR_METRICS name, a weekday or a month name
+        """
+        name = check_metric(name)
+        if name in SCALAR_METRICS:
+            return getattr(self, name)()
+        if name in WEEKDAYS:
+            return self.weekday_totals()[:, WEEKDAYS.index(name)]
+        return self.month_totals()[:, MONTHS.index(name)]
+
+    def rank(self, name: str) -> np.ndarray:
+        """
+        1 for the highest value; tied users share the best rank
+        """
+        values: np.ndarray = self.metric(name)
+        return len(values) - np.searchsorted(np.sort(values), values, side="right") + 1
+
+    def percentile(self, name: str) -> np.ndarray:
+        """
+        Share of the cohort (in %) whose value is at most the user's
+        """
+        values: np.ndarray = self.metric(name)
+        return 100 * np.searchsorted(np.sort(values), values, side="right") / max(len(values), 1)
+
+    def top(self, name: str, fraction: float = 0.1) -> list[str]:
+        """
+        Users in the top `fraction` of the cohort by `name`, best first
+        """
+        values: np.ndarray = self.metric(name)
+        count: int = max(1, int(np.ceil(len(values) * fraction))) if len(values) else 0
+        order: np.ndarray = np.argsort(-values, kind="stable")[:count]
+        return [self.usernames[i] for i in order]
+
+    def quantiles(self, name: str, q: Iterable[float] = (0.5, 0.9, 0.99)) -> dict[str, float]:
+        values: np.ndarray = self.metric(name)
+        if not len(values):
+            return {}
+        return {f"p{round(p * 100):g}": float(v) for p, v in zip(q, np.quantile(values, list(q)))}
+
+    def summary(self, kinds: Iterable[str] = DAY_KINDS) -> list[dict]:
+        """
+        Per user, what /contributions/day/<kind> answers for a single user, for each of `kinds`
+        """
+        kinds = tuple(kinds)
+        responses: list[dict] = [{} for _ in self.usernames]
+        for kind in ("most", "least"):
+            if kind in kinds:
+                values: np.ndarray = getattr(self, kind)()
+                for response, value, dates in zip(responses, values.tolist(), self.dates_where(values)):
+                    response[kind] = {f"{kind}_contribution": value, "dates": dates, "total_days": len(dates)}
+        if "average" in kinds:
+            for response, value in zip(responses, self.average().tolist()):
+                response["average"] = {"average_day_contribution": round(value)}
+        if "weekday" in kinds:
+            totals: np.ndarray = self.weekday_totals()
+            for i, best in enumerate(self.busiest_weekday().tolist()):
+                responses[i]["weekday"] = {"weekday": WEEKDAYS[best], "contribution": int(totals[i, best])}
+        if "month" in kinds:
+            totals = self.month_totals()
+            for i, best in enumerate(self.busiest_month().tolist()):
+                responses[i]["month"] = {"month": MONTHS[best], "contribution": int(totals[i, best])}
+        return [{"username": username, "response": {kind: response[kind] for kind in kinds}}
+                for username, response in zip(self.usernames, responses)]
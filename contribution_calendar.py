@@ -0,0 +1,186 @@
+from typing import Optional, Union
+import numpy as np
+
+# proleptic ordinal of 1970-01-01, the datetime64 epoch
+EPOCH_ORDINAL: int = 719163
+INT16_MAX: int = int(np.iinfo(np.int16).max)
+
+
+def flatten_calendar(data: dict) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Flatten the weeks/contributionDays tree into (dates, counts) arrays in one pass
+    """
+    dates: list[str] = []
+    counts: list[int] = []
+    for week in data["data"]["user"]["contributionsCollection"]["contributionCalendar"]["weeks"]:
+        for day in week["contributionDays"]:
+            dates.append(day["date"])
+            counts.append(day["contributionCount"])
+    return np.array(dates, dtype="datetime64[D]"), np.array(counts, dtype=np.int32)
+
+
+def compact_counts(counts: np.ndarray) -> np.ndarray:
+    """
+    Counts as int16 when every day fits, int32 otherwise; arrays already in that dtype are not copied
+    """
+    counts = np.asarray(counts)
+    if counts.dtype == np.int16:
+        return counts
+    if len(counts) and counts.max() > INT16_MAX:
+        return counts.astype(np.int32, copy=False)
+    return counts.astype(np.int16)
+
+
+class ContributionCalendar:
+    """
+    Parsed, array-backed calendar: a start ordinal plus one compact count per day. Date parts
+    (month, day, weekday, ISO week, week of month) are derived on first use. Calendars whose
+    days are not consecutive keep their ordinals explicitly.
+    """
+    __slots__ = ("start", "counts", "_ordinals", "_parts")
+
+    def __init__(self, dates: np.ndarray, counts: np.ndarray) -> None:
+        ordinals: np.ndarray = dates.astype("datetime64[D]").astype(np.int64) + EPOCH_ORDINAL
+        self.start: int = int(ordinals[0]) if len(ordinals) else EPOCH_ORDINAL
+        self.counts: np.ndarray = compact_counts(counts)
+        consecutive: bool = len(ordinals) == 0 or bool(np.all(np.diff(ordinals) == 1))
+        self._ordinals: Optional[np.ndarray] = None if consecutive else ordinals
+        self._parts: Optional[dict[str, np.ndarray]] = None
+
+    @classmethod
+    def from_counts(cls, start: int, counts: np.ndarray) -> "ContributionCalendar":
+        """
+        Calendar of consecutive days from ordinal `start`; compact `counts` (e.g. a memmap slice) are not copied
+        """
+        calendar: ContributionCalendar = cls.__new__(cls)
+        calendar.start = int(start)
+        counts = np.asarray(counts)
+        # an int32 archive view stays a view even when this user's counts would fit int16
+        calendar.counts = counts if counts.dtype in (np.int16, np.int32) else compact_counts(counts)
+        calendar._ordinals = None
+        calendar._parts = None
+        return calendar
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def __getitem__(self, index: slice) -> "ContributionCalendar":
+        """
+        Slice of days sharing this calendar's counts
+        """
+        if not isinstance(index, slice) or index.step not in (None, 1):
+            raise TypeError("calendars can only be sliced with a step of 1")
+        first, last, _ = index.indices(len(self))
+        if self._ordinals is not None:
+            return ContributionCalendar(self.dates[first:last], self.counts[first:last])
+        return ContributionCalendar.from_counts(self.start + first, self.counts[first:max(first, last)])
+
+    @property
+    def consecutive(self) -> bool:
+        return self._ordinals is None
+
+    @property
+    def ordinals(self) -> np.ndarray:
+        if self._ordinals is not None:
+            return self._ordinals
+        return np.arange(self.start, self.start + len(self.counts), dtype=np.int64)
+
+    @property
+    def dates(self) -> np.ndarray:
+        return (self.ordinals - EPOCH_ORDINAL).astype("datetime64[D]")
+
+    def filled(self) -> "ContributionCalendar":
+        """
+        Consecutive calendar from the first to the last day, days missing from this one counting zero
+        """
+        if self._ordinals is None:
+            return self
+        counts: np.ndarray = np.zeros(int(self._ordinals[-1] - self.start) + 1, dtype=self.counts.dtype)
+        counts[self._ordinals - self.start] = self.counts
+        return ContributionCalendar.from_counts(self.start, counts)
+
+    def parts(self) -> dict[str, np.ndarray]:
+        if self._parts is None:
+            days: np.ndarray = self.ordinals - EPOCH_ORDINAL
+            months: np.ndarray = days.astype("datetime64[D]").astype("datetime64[M]")
+            month: np.ndarray = (months.astype(np.int64) % 12 + 1).astype(np.int8)
+            day: np.ndarray = (days - months.astype("datetime64[D]").astype(np.int64) + 1).astype(np.int8)
+            # Monday == 0, like datetime.weekday(); 1970-01-01 was a Thursday
+            weekday: np.ndarray = ((days + 3) % 7).astype(np.int8)
+            # the ISO week is the week of the year holding that week's Thursday
+            thursday: np.ndarray = days - weekday + 3
+            year_start: np.ndarray = thursday.astype("datetime64[D]").astype(
+                "datetime64[Y]").astype("datetime64[D]").astype(np.int64)
+            iso_week: np.ndarray = ((thursday - year_start) // 7 + 1).astype(np.int8)
+            first_weekday: np.ndarray = ((days - day + 1 + 3) % 7).astype(np.int8)
+            week_of_month: np.ndarray = (-(-(day + first_weekday) // 7)).astype(np.int8)
+            self._parts = {"month": month, "day": day, "weekday": weekday,
+                           "iso_week": iso_week, "week_of_month": week_of_month}
+        return self._parts
+
+    @property
+    def month(self) -> np.ndarray:
+        return self.parts()["month"]
+
+    @property
+    def day(self) -> np.ndarray:
+        return self.parts()["day"]
+
+    @property
+    def weekday(self) -> np.ndarray:
+        return self.parts()["weekday"]
+
+    @property
+    def iso_week(self) -> np.ndarray:
+        return self.parts()["iso_week"]
+
+    @property
+    def week_of_month(self) -> np.ndarray:
+        return self.parts()["week_of_month"]
+
+    @classmethod
+    def from_payload(cls, payload: dict) -> "ContributionCalendar":
+        dates, counts = flatten_calendar(payload)
+        return cls(dates, compact_counts(counts))
+
+    @classmethod
+    def merge(cls, calendars: list["ContributionCalendar"]) -> "ContributionCalendar":
+        """
+        One calendar with the days of all `calendars`; a day found in several keeps the first one's
+        count, like merge_calendars
+        """
+        ordinals: np.ndarray = np.concatenate([c.ordinals for c in calendars])
+        counts: np.ndarray = np.concatenate([c.counts for c in calendars])
+        unique, first = np.unique(ordinals, return_index=True)
+        return cls((unique - EPOCH_ORDINAL).astype("datetime64[D]"), compact_counts(counts[first]))
+
+    @classmethod
+    def of(cls, raw_data: Union[dict, "ContributionCalendar"]) -> "ContributionCalendar":
+        """
+        `raw_data` itself when it is already a calendar, otherwise the parsed payload. To share one
+        parse between several models, parse once and pass the calendar to each of them.
+        """
+        if isinstance(raw_data, ContributionCalendar):
+            return raw_data
+        return cls.from_payload(raw_data)
+
+    def period_totals(self, keys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Totals of consecutive runs of equal `keys` (e.g. ISO week or month), as (first day index, total).
+        The trailing run is left out as it may be incomplete, and periods are accumulated the way the
+        models were trained originally: a run following an empty run loses its first day's count,
+        and runs that total zero are skipped.
+        """
+        if len(keys) == 0:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+        starts: np.ndarray = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        sums: np.ndarray = np.add.reduceat(self.counts.astype(np.int64), starts)
+        first: np.ndarray = self.counts[starts].astype(np.int64)
+        totals: list[int] = []
+        previous: int = -1
+        for i in range(len(starts)):
+            previous = int(sums[i]) - (int(first[i]) if previous == 0 else 0)
+            totals.append(previous)
+        emitted: np.ndarray = np.array(totals[:-1], dtype=np.int64)
+        keep: np.ndarray = emitted != 0
+        return starts[:-1][keep], emitted[keep]
@@ -0,0 +1,288 @@
+"""
+Local stand-in for the GitHub GraphQL endpoint. Answers the contribution calendar query of
+`Contributions` for any login with a deterministic synthetic calendar, with configurable
+latency, error rate and per-token rate limits.
+
+    python -m fake_github --port 8765 --latency 0.05 --error-rate 0.01 --rate-limit 5000
+    GITHUB_GRAPHQL_URL=http://127.0.0.1:8765/graphql flask --app api run
+"""
+import re
+import sys
+import json
+import time
+import zlib
+import random
+import argparse
+import threading
+import datetime as dt
+from itertools import groupby
+from typing import Any, Iterable, Optional
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+from query import DATE_FORMAT, DAY_FIELDS, USER_FIELDS
+
+COLORS: tuple[str, ...] = ("#ebedf0", "#9be9a8", "#40c463", "#30a14e", "#216e39")
+# every synthetic account is created between these two dates
+CREATED_RANGE: tuple[dt.date, dt.date] = (dt.date(2008, 1, 1), dt.date(2021, 1, 1))
+
+
+def requested_fields(query: str) -> dict[str, Any]:
+    """
+    Fields selected by a contribution calendar query, as built by `query.QueryBuilder`
+    """
+    def selection(pattern: str, default: tuple[str, ...]) -> tuple[str, ...]:
+        match = re.search(pattern, query)
+        return tuple(match.group(1).split()) if match else default
+    return {
+        "user": selection(r"user\(login: \$login\) \{([\w\s]*?)contributionsCollection", USER_FIELDS),
+        "day": selection(r"contributionDays \{([\w\s]*)\}", DAY_FIELDS),
+        "month": selection(r"months \{([\w\s]*)\}", ()),
+        "rate_limit": "rateLimit" in query,
+    }
+
+
+class FakeGitHub:
+    """
+    Synthetic calendars and the per-token budgets behind `FakeGitHubServer`. Counts depend only on
+    (seed, login, date), so overlapping windows and repeated runs agree.
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 rate_limit: int = 5000, window: float = 3600, seed: int = 0,
+                 not_found: Iterable[str] = ()) -> None:
+        self.latency: float = latency
+        self.jitter: float = jitter
+        self.error_rate: float = error_rate
+        self.rate_limit: int = rate_limit
+        self.window: float = window
+        self.seed: int = seed
+        self.not_found: frozenset[str] = frozenset(login.lower() for login in not_found)
+        self.budgets: dict[str, tuple[int, float]] = {}
+        self.requests: int = 0
+        self.errors: int = 0
+        self.rejected: int = 0
+        self.random: random.Random = random.Random(seed)
+        self.lock: threading.Lock = threading.Lock()
+
+    def user_seed(self, login: str) -> list[int]:
+        return [self.seed, zlib.crc32(login.lower().encode())]
+
+    def profile(self, login: str) -> tuple[dt.date, float, float]:
+        """
+        (createdAt, share of active days, mean contributions on an active day) of a login
+        """
+        rng = np.random.default_rng(self.user_seed(login))
+        span: int = (CREATED_RANGE[1] - CREATED_RANGE[0]).days
+        created: dt.date = CREATED_RANGE[0] + dt.timedelta(days=int(rng.integers(span)))
+        return created, float(rng.uniform(0.05, 0.9)), float(rng.uniform(1, 8))
+
+    def counts(self, login: str, start: dt.date, end: dt.date) -> np.ndarray:
+        created, density, mean = self.profile(login)
+        parts: list[np.ndarray] = []
+        for year in range(start.year, end.year + 1):
+            rng = np.random.default_rng(self.user_seed(login) + [year])
+            active: np.ndarray = rng.random(366) < density
+            year_counts: np.ndarray = np.where(active, rng.poisson(mean - 1, 366) + 1, 0)
+            first: dt.date = max(start, dt.date(year, 1, 1))
+            last: dt.date = min(end, dt.date(year, 12, 31))
+            parts.append(year_counts[first.timetuple().tm_yday - 1:last.timetuple().tm_yday])
+        counts: np.ndarray = np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+        counts[:max(0, (created - start).days)] = 0
+        return counts
+
+    def calendar(self, login: str, start: dt.date, end: dt.date, fields: dict[str, Any]) -> dict:
+        counts: np.ndarray = self.counts(login, start, end)
+        levels: np.ndarray = np.digitize(counts, np.quantile(counts[counts > 0], [0.25, 0.5, 0.75])) + 1 \
+            if counts.any() else np.zeros(len(counts), dtype=np.int64)
+        days: list[dict] = []
+        for offset, count in enumerate(counts.tolist()):
+            date: dt.date = start + dt.timedelta(days=offset)
+            day: dict = {"weekday": (date.weekday() + 1) % 7, "date": date.isoformat(),
+                         "contributionCount": count, "color": COLORS[levels[offset] if count else 0]}
+            days.append({name: day[name] for name in fields["day"]})
+
+        def week_start(offset: int) -> dt.date:
+            date: dt.date = start + dt.timedelta(days=offset)
+            return date - dt.timedelta(days=(date.weekday() + 1) % 7)
+        weeks: list[dict] = [{"contributionDays": [days[i] for i in group]}
+                             for _, group in groupby(range(len(days)), key=week_start)]
+        result: dict = {"totalContributions": int(counts.sum()), "weeks": weeks}
+        if fields["month"]:
+            months: list[dict] = []
+            for (year, month), group in groupby(range(len(days)), key=lambda i: (
+                    (start + dt.timedelta(days=i)).year, (start + dt.timedelta(days=i)).month)):
+                offsets: list[int] = list(group)
+                first: dt.date = start + dt.timedelta(days=offsets[0])
+                month_data: dict = {"name": first.strftime("%b"), "year": year, "firstDay": first.isoformat(),
+                                    "totalWeeks": len({week_start(i) for i in offsets})}
+                months.append({name: month_data[name] for name in fields["month"]})
+            result["months"] = months
+        return result
+
+    def spend(self, token: str) -> tuple[bool, int, float]:
+        """
+        Charge one point to a token: (allowed, remaining, reset epoch)
+        """
+        now: float = time.time()
+        with self.lock:
+            remaining, reset = self.budgets.get(token, (self.rate_limit, now + self.window))
+            if reset <= now:
+                remaining, reset = self.rate_limit, now + self.window
+            allowed: bool = remaining > 0
+            if allowed:
+                remaining -= 1
+            else:
+                self.rejected += 1
+            self.budgets[token] = (remaining, reset)
+        return allowed, remaining, reset
+
+    def respond(self, body: dict, token: str) -> tuple[int, dict[str, str], dict]:
+        """
+        (status, headers, json body) for one GraphQL request
+        """
+        with self.lock:
+            self.requests += 1
+            delay: float = self.latency + self.random.uniform(0, self.jitter)
+            failed: bool = self.random.random() < self.error_rate
+            if failed:
+                self.errors += 1
+        if delay:
+            time.sleep(delay)
+        allowed, remaining, reset = self.spend(token)
+        headers: dict[str, str] = {"X-RateLimit-Limit": str(self.rate_limit),
+                                   "X-RateLimit-Remaining": str(remaining),
+                                   "X-RateLimit-Reset": str(int(reset))}
+        if not allowed:
+            return 403, headers, {"message": "API rate limit exceeded",
+                                  "documentation_url": "https://docs.github.com/graphql/overview/resource-limitations"}
+        if failed:
+            return 502, headers, {"message": "Server Error"}
+
+        variables: dict = body.get("variables") or {}
+        fields: dict[str, Any] = requested_fields(body.get("query", ""))
+        login: str = str(variables.get("login", ""))
+        end: dt.datetime = dt.datetime.strptime(variables["to"], DATE_FORMAT) if variables.get("to") \
+            else dt.datetime.now()
+        start: dt.datetime = dt.datetime.strptime(variables["from"], DATE_FORMAT) if variables.get("from") \
+            else end - dt.timedelta(days=365)
+        data: dict = {}
+        if fields["rate_limit"]:
+            data["rateLimit"] = {"cost": 1, "remaining": remaining,
+                                 "resetAt": dt.datetime.fromtimestamp(reset, dt.timezone.utc).strftime(DATE_FORMAT)}
+        if not login or login.lower() in self.not_found:
+            data["user"] = None
+            return 200, headers, {"data": data, "errors": [{
+                "type": "NOT_FOUND", "path": ["user"],
+                "message": f"Could not resolve to a User with the login of '{login}'."}]}
+        if not start < end or (end - start) > dt.timedelta(days=366):
+            data["user"] = None
+            return 200, headers, {"data": data, "errors": [{
+                "path": ["user", "contributionsCollection"],
+                "message": "The total time spanned by 'from' and 'to' must not exceed 1 year"}]}
+
+        created, _, _ = self.profile(login)
+        user_data: dict = {"email": "", "createdAt": f"{created.isoformat()}T00:00:00Z"}
+        user: dict = {name: user_data[name] for name in fields["user"]}
+        user["contributionsCollection"] = {"contributionCalendar": self.calendar(
+            login, start.date(), end.date(), fields)}
+        data["user"] = user
+        return 200, headers, {"data": data}
+
+    def stats(self) -> dict[str, int]:
+        with self.lock:
+            return {"requests": self.requests, "errors": self.errors, "rejected": self.rejected}
+
+
+class FakeGitHubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server: "FakeGitHubServer"
+
+    def do_POST(self):
+        raw: bytes = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        token: str = self.headers.get("Authorization", "").rpartition(" ")[2]
+        try:
+            status, headers, body = self.server.github.respond(json.loads(raw or b"{}"), token)
+        except (ValueError, KeyError) as error:
+            status, headers, body = 400, {}, {"message": f"Problems parsing JSON: {error}"}
+        content: bytes = json.dumps(body).encode()
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeGitHubServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server around a `FakeGitHub`; port 0 picks a free port.
+
+        with FakeGitHubServer(FakeGitHub(latency=0.05)) as server:
+            Contributions(url=server.url).get_query("octocat")
+    """
+    daemon_threads = True
+
+    def __init__(self, github: Optional[FakeGitHub] = None, host: str = "127.0.0.1", port: int = 0) -> None:
+        super().__init__((host, port), FakeGitHubHandler)
+        self.github: FakeGitHub = github or FakeGitHub()
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/graphql"
+
+    def start(self) -> "FakeGitHubServer":
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self.thread is not None:
+            self.shutdown()
+            self.thread.join()
+            self.thread = None
+        self.server_close()
+
+    def __enter__(self) -> "FakeGitHubServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random latency, up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered 502")
+    parser.add_argument("--rate-limit", type=int, default=5000, help="points per token per window")
+    parser.add_argument("--window", type=float, default=3600, help="seconds until a token's budget resets")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--not-found", default="", help="comma separated logins answered NOT_FOUND")
+    args = parser.parse_args(argv)
+
+    github: FakeGitHub = FakeGitHub(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, rate_limit=args.rate_limit,
+        window=args.window, seed=args.seed, not_found=[u for u in args.not_found.split(",") if u])
+    server: FakeGitHubServer = FakeGitHubServer(github, args.host, args.port)
+    print(f"fake GitHub GraphQL on {server.url}\nexport GITHUB_GRAPHQL_URL={server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(github.stats()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,95 +1,391 @@
-import json
+import asyncio
 import requests
-from jinja2 import Template
 import os
+import time
 import pandas as pd
+import numpy as np
 import datetime as dt
-from Regression import BestModel, Predictor, NONE_PREDICTOR
+import calendar
 from math import ceil
-from typing import Any
+from types import ModuleType
+from typing import TYPE_CHECKING, Any, AsyncIterator, Iterable, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
+from cache import Cache, cache_key, cache_from_env
+from session import build_session, should_retry, is_rate_limited, retry_delay, connection_stats
+from ratelimit import TokenPool, RateLimitExceeded
+from query import QueryBuilder, FULL_QUERY, DATE_FORMAT
+from contribution_calendar import ContributionCalendar, flatten_calendar
+from calendar_stream import CalendarStreamParser
+from registry import ModelRegistry
+from metrics import (GRAPHQL_SECONDS, GRAPHQL_DECODE_SECONDS, GRAPHQL_RESPONSE_BYTES, QUERY_CACHE,
+                     STATISTICS_SECONDS, DATA_PREP_SECONDS)
+
+if TYPE_CHECKING:
+    from Regression import Predictor
 
 NONE_DATE: dt.datetime = dt.datetime(1, 1, 1, 0, 0)
+WEEKDAYS: list[str] = list(calendar.day_name)
+MONTHS: list[str] = list(calendar.month_name)[1:]
+# what /contributions/day/<kind> answers
+DAY_KINDS: tuple[str, ...] = ("most", "average", "least", "weekday", "month")
+
+
+def regression() -> ModuleType:
+    """
+    Regression pulls in scikit-learn and scipy, so it is imported on first use:
+    the stats endpoints never need it
+    """
+    import Regression
+    return Regression
+
+
+def __getattr__(name: str) -> Any:
+    if name in ("BestModel", "Predictor", "NONE_PREDICTOR"):
+        return getattr(regression(), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def year_windows(start: dt.datetime, end: dt.datetime) -> list[tuple[dt.datetime, dt.datetime]]:
+    """
+    Split the dates from `start` to `end` into windows of at most 365 whole dates, latest first.
+    A window runs from a midnight to the last second of its last date (or to `end` itself), so
+    every date is requested by exactly one window. An `end` at midnight is exclusive.
+    """
+    first: dt.date = start.date()
+    last: dt.date = end.date() if end.time() != dt.time() else end.date() - dt.timedelta(days=1)
+    windows: list[tuple[dt.datetime, dt.datetime]] = []
+    while last >= first:
+        window_first: dt.date = max(first, last - dt.timedelta(days=364))
+        window_end: dt.datetime = min(end, dt.datetime.combine(last, dt.time.max.replace(microsecond=0)))
+        windows.append((dt.datetime.combine(window_first, dt.time()), window_end))
+        last = window_first - dt.timedelta(days=1)
+    return windows
+
+
+def merge_calendars(payloads: list[dict]) -> dict:
+    """
+    Merge the calendars of several query payloads into one payload whose weeks are de-duplicated
+    by date (the first payload with a date wins) and regrouped into Sunday-first weeks. User fields
+    are taken from the first payload.
+    """
+    days: dict[str, dict] = {}
+    months: dict[tuple[int, str], dict] = {}
+    for payload in payloads:
+        calendar_data: dict = payload["data"]["user"]["contributionsCollection"]["contributionCalendar"]
+        for week in calendar_data["weeks"]:
+            for day in week["contributionDays"]:
+                days.setdefault(day["date"], day)
+        for month in calendar_data.get("months", []):
+            months.setdefault((month["year"], month["firstDay"]), month)
+
+    ordered: list[dict] = [days[date] for date in sorted(days)]
+
+    def week_start(day: dict) -> dt.date:
+        date: dt.date = dt.date.fromisoformat(day["date"])
+        return date - dt.timedelta(days=(date.weekday() + 1) % 7)
+    weeks: list[dict] = [{"contributionDays": list(group)}
+                         for _, group in groupby(ordered, key=week_start)]
+
+    user: dict = dict(payloads[0]["data"]["user"])
+    user["contributionsCollection"] = {"contributionCalendar": {
+        "totalContributions": sum(day["contributionCount"] for day in ordered),
+        "weeks": weeks,
+        "months": [months[key] for key in sorted(months)],
+    }}
+    return {"data": {"user": user}}
 
 
 class Contributions:
-    def __init__(self):
-        self.url: str = 'https://api.github.com/graphql'
+    def __init__(self, cache: Optional[Cache] = None, pool_size: int = 10, timeout: float = 30,
+                 max_retries: int = 3, backoff: float = 0.5, query_builder: QueryBuilder = FULL_QUERY,
+                 url: Optional[str] = None):
+        # GITHUB_GRAPHQL_URL points the client at another endpoint, e.g. `python -m fake_github`
+        self.url: str = url or os.getenv('GITHUB_GRAPHQL_URL', 'https://api.github.com/graphql')
+        self.query_builder: QueryBuilder = query_builder
         self.token: str = "" if (n := os.getenv(
             'GITHUB_PERSONAL_TOKEN')) is None else str(n)
         self.header: dict = {'Authorization': f'bearer {self.token}'}
-
-    @staticmethod
-    def get_date_range(start: dt.datetime, end: dt.datetime) -> str:
-        if start == NONE_DATE:
-            def strf(x): return x.strftime('%Y-%m-%dT%H:%M:%SZ')
-            return f'(from: "{strf(start)}", to: "{strf(end)}")'
-        else:
-            return ""
+        # comma separated GITHUB_PERSONAL_TOKENS spread bulk jobs across several budgets
+        self.tokens: TokenPool = TokenPool(
+            [t.strip() for t in os.getenv('GITHUB_PERSONAL_TOKENS', self.token).split(",") if t.strip()],
+            max_wait=float(os.getenv('RATE_LIMIT_MAX_WAIT', 60)))
+        self.cache: Optional[Cache] = cache
+        self.timeout: float = timeout
+        self.max_retries: int = max_retries
+        self.backoff: float = backoff
+        self.session: requests.Session = build_session(pool_size=pool_size)
+
+    def post(self, query: dict, stream: bool = False) -> requests.Response:
+        """
+        POST through the pooled session, retrying 5xx and rate limits with jittered backoff.
+        With `stream` the body of the returned response is left unread.
+        """
+        attempt: int = 0
+        while True:
+            token: str = self.tokens.acquire()
+            try:
+                response: requests.Response = self.session.post(
+                    self.url, json=query, timeout=self.timeout, stream=stream,
+                    headers={'Authorization': f'bearer {token}'})
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+                time.sleep(retry_delay(attempt, self.backoff))
+            else:
+                self.tokens.observe(token, response)
+                if attempt >= self.max_retries:
+                    return response
+                if not is_rate_limited(response):
+                    if not should_retry(response):
+                        return response
+                    time.sleep(retry_delay(attempt, self.backoff, response))
+                response.close()
+                # an exhausted token is retried at once: acquire() picks another or waits for the reset
+            attempt += 1
+
+    def connection_stats(self) -> dict[str, int]:
+        return connection_stats(self.session)
 
     @property
     def template(self) -> str:
-        return """query {
-        user(login: "{{ username }}") {
-          email
-          createdAt
-          contributionsCollection {{ date_range }} {
-            contributionCalendar {
-              totalContributions
-              weeks {
-                contributionDays {
-                  weekday
-                  date
-                  contributionCount
-                  color
-                }
-              }
-              months  {
-                name
-                  year
-                  firstDay
-                totalWeeks
-
-              }
-            }
-          }
-        }
-
-      }
-      """
+        return self.query_builder.query
 
-    def get_query_data(self, username: str, start: dt.datetime, end: dt.datetime) -> str:
-        t: Template = Template(self.template)
-        return t.render(username=username, date_range=self.get_date_range(start, end))
+    def get_query_data(self, username: str, start: dt.datetime, end: dt.datetime) -> dict[str, Any]:
+        return self.query_builder.build(username, start, end)
 
-    def get_query(self, username: str, start_date: dt.datetime = NONE_DATE, end_date: dt.datetime = dt.datetime.now()) -> dict:
+    def get_query(self, username: str, start_date: dt.datetime = NONE_DATE, end_date: dt.datetime = NONE_DATE) -> dict:
+        if end_date == NONE_DATE:
+            end_date = dt.datetime.now()
+        if start_date == NONE_DATE:
+            start_date = end_date - dt.timedelta(days=365)
+        key: str = cache_key(username, start_date, end_date,
+                             self.query_builder.key)
+        if self.cache is not None:
+            if (cached := self.cache.get(key)) is not None:
+                QUERY_CACHE.inc(result="hit")
+                return cached
+            QUERY_CACHE.inc(result="miss")
+        query: dict = self.get_query_data(username, start_date, end_date)
+        started: float = time.perf_counter()
+        try:
+            response: requests.Response = self.post(query)
+        except RateLimitExceeded as error:
+            GRAPHQL_SECONDS.observe(time.perf_counter() - started, status="rate_limited")
+            return {"error": str(error)}
+        except requests.RequestException:
+            GRAPHQL_SECONDS.observe(time.perf_counter() - started, status="connection_error")
+            raise
+        GRAPHQL_SECONDS.observe(time.perf_counter() - started, status=str(response.status_code))
+        GRAPHQL_RESPONSE_BYTES.observe(len(response.content))
+        if response.status_code != 200:
+            try:
+                return {"error": response.json()}
+            except ValueError:
+                return {"error": response.text}
+        with GRAPHQL_DECODE_SECONDS.time():
+            result: dict = response.json()
+        if (rate_limit := (result.get("data") or {}).get("rateLimit")):
+            self.tokens.observe_rate_limit(rate_limit)
+        if self.cache is not None and "errors" not in result:
+            self.cache.set(key, result)
+        return result
+
+    def get_calendar(self, username: str, start_date: dt.datetime = NONE_DATE, end_date: dt.datetime = NONE_DATE,
+                     chunk_size: int = 1 << 16) -> tuple[dict, Optional[ContributionCalendar]]:
+        """
+        Like get_query, but the days are parsed into a ContributionCalendar while the body streams in,
+        without building the JSON tree of the days. Returns the payload with an empty `weeks` list
+        (or {"error": ...}) and the calendar, None on errors. The response cache is not used.
+        """
+        if end_date == NONE_DATE:
+            end_date = dt.datetime.now()
         if start_date == NONE_DATE:
             start_date = end_date - dt.timedelta(days=365)
-        query: dict = {
-            "query": f"{self.get_query_data(username, start_date, end_date)}"}
-        response: requests.Response = requests.post(
-            self.url, json=query, headers=self.header)
+        query: dict = self.get_query_data(username, start_date, end_date)
+        started: float = time.perf_counter()
+        try:
+            response: requests.Response = self.post(query, stream=True)
+        except RateLimitExceeded as error:
+            GRAPHQL_SECONDS.observe(time.perf_counter() - started, status="rate_limited")
+            return {"error": str(error)}, None
+        except requests.RequestException:
+            GRAPHQL_SECONDS.observe(time.perf_counter() - started, status="connection_error")
+            raise
+        parser: CalendarStreamParser = CalendarStreamParser()
+        try:
+            with response:
+                for chunk in response.iter_content(chunk_size):
+                    parser.feed(chunk)
+            payload, calendar = parser.close()
+        except ValueError as error:
+            return {"error": f"unreadable response ({response.status_code}): {error}"}, None
+        finally:
+            GRAPHQL_SECONDS.observe(time.perf_counter() - started, status=str(response.status_code))
+            GRAPHQL_RESPONSE_BYTES.observe(parser.size)
         if response.status_code != 200:
-            return {"error": json.loads(response.content.decode("utf-8"))}
-        return response.json()
+            return {"error": payload}, None
+        if (rate_limit := (payload.get("data") or {}).get("rateLimit")):
+            self.tokens.observe_rate_limit(rate_limit)
+        return payload, calendar
+
+    def get_calendar_history(self, username: str, concurrency: int = 4) -> tuple[dict, Optional[ContributionCalendar]]:
+        """
+        get_history through the streaming parser: year windows are fetched concurrently as
+        calendars and merged. The payload is the latest window's, without days.
+        """
+        now: dt.datetime = dt.datetime.now()
+        start_date, end_date = year_windows(now - dt.timedelta(days=365), now)[0]
+        latest, calendar = self.get_calendar(username, start_date, end_date)
+        if calendar is None or not (latest.get("data") or {}).get("user"):
+            return latest, None
+        created: dt.datetime = dt.datetime.strptime(
+            latest["data"]["user"]["createdAt"], DATE_FORMAT)
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            older: list[tuple[dict, Optional[ContributionCalendar]]] = list(executor.map(
+                lambda window: self.get_calendar(username, *window), year_windows(created, start_date)))
+        for payload, window_calendar in older:
+            if window_calendar is None or not (payload.get("data") or {}).get("user"):
+                return payload, None
+        return latest, ContributionCalendar.merge([calendar] + [c for _, c in older])
+
+    def get_history(self, username: str, concurrency: int = 4) -> dict:
+        """
+        Full contribution history since the account was created, fetched as concurrent year windows
+        """
+        now: dt.datetime = dt.datetime.now()
+        start_date, end_date = year_windows(now - dt.timedelta(days=365), now)[0]
+        latest: dict = self.get_query(username, start_date, end_date)
+        if "error" in latest or not (latest.get("data") or {}).get("user"):
+            return latest
+        created: dt.datetime = dt.datetime.strptime(
+            latest["data"]["user"]["createdAt"], DATE_FORMAT)
+        older: list[tuple[dt.datetime, dt.datetime]] = year_windows(
+            created, start_date)
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            payloads: list[dict] = list(executor.map(
+                lambda window: self.get_query(username, *window), older))
+        for payload in payloads:
+            if "error" in payload or not (payload.get("data") or {}).get("user"):
+                return payload
+        return merge_calendars([latest] + payloads)
+
+    async def get_query_many(self, usernames: Iterable[str], start_date: dt.datetime = NONE_DATE,
+                             end_date: dt.datetime = NONE_DATE, concurrency: int = 8) -> AsyncIterator[tuple[str, dict]]:
+        """
+        Yield (username, result) as each query completes, with at most `concurrency` in flight.
+        A failing user yields {"error": ...} instead of aborting the batch.
+        """
+        loop = asyncio.get_running_loop()
+        if end_date is NONE_DATE:
+            end_date = dt.datetime.now()
+
+        def fetch(username: str) -> tuple[str, dict]:
+            try:
+                return username, self.get_query(username, start_date, end_date)
+            except Exception as error:
+                return username, {"error": str(error)}
+
+        # not a `with` block: its shutdown(wait=True) would block the event loop until every
+        # queued query finished when the caller stops early or is cancelled
+        executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=concurrency)
+        pending: set = set()
+        try:
+            for username in usernames:
+                if len(pending) >= concurrency:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        yield task.result()
+                pending.add(loop.run_in_executor(executor, fetch, username))
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
 
 
 class Statistics:
-    def __init__(self, data: dict):
-        self.data: dict = data
-        self.total_contributions: int = data["data"]["user"][
+    def __init__(self, data: Optional[dict] = None, columns: Optional[tuple[np.ndarray, np.ndarray]] = None):
+        self._index: Optional[dict[str, pd.DataFrame]] = None
+        with STATISTICS_SECONDS.time():
+            self.load(data, columns)
+
+    def load(self, data: Optional[dict] = None, columns: Optional[tuple[np.ndarray, np.ndarray]] = None) -> None:
+        """
+        Replace the underlying data, dropping the cached aggregate index
+        """
+        self._data: Optional[dict] = data
+        self.columns: tuple[np.ndarray, np.ndarray] = flatten_calendar(
+            data) if columns is None else columns
+        self.total_contributions: int = int(self.columns[1].sum()) if data is None else data["data"]["user"][
             "contributionsCollection"]["contributionCalendar"]["totalContributions"]
-        self.tf_data: pd.DataFrame = self.days_contribution()
+        self.tf_data = self.days_contribution()
+
+    @property
+    def data(self) -> Optional[dict]:
+        return self._data
+
+    @data.setter
+    def data(self, data: dict) -> None:
+        self.load(data)
+
+    @property
+    def tf_data(self) -> pd.DataFrame:
+        return self._tf_data
+
+    @tf_data.setter
+    def tf_data(self, frame: pd.DataFrame) -> None:
+        self._tf_data: pd.DataFrame = frame
+        self._index = None
+
+    @property
+    def index(self) -> dict[str, pd.DataFrame]:
+        """
+        Weekday, month and ISO-week sums, built on first use and reused until the data is replaced
+        """
+        if self._index is None:
+            df: pd.DataFrame = self.tf_data
+            iso: pd.DataFrame = df.date.dt.isocalendar()
+
+            def ranked(by: str) -> pd.DataFrame:
+                return df.groupby(by=by, observed=True)[["contribution"]].sum().sort_values(
+                    by=['contribution'], ascending=False)
+            self._index = {
+                "day": ranked("day"),
+                "month": ranked("month"),
+                "week": df[["contribution"]].groupby([iso.year, iso.week]).sum(),
+            }
+        return self._index
+
+    @classmethod
+    def from_store(cls, store: Any, username: str, history: bool = False) -> "Statistics":
+        """
+        Build straight from a ContributionStore's columns without a payload round trip:
+        the store's trailing year, or every stored day with `history`
+        """
+        return cls(columns=store.read(username, days=None) if history else store.read(username))
+
+    @classmethod
+    def from_calendar(cls, calendar: ContributionCalendar) -> "Statistics":
+        """
+        Build from a ContributionCalendar, e.g. a CalendarArchive view, without a payload round trip
+        """
+        return cls(columns=(calendar.dates, calendar.counts))
 
     def days_contribution(self) -> pd.DataFrame:
-        data: list = []
-        for week in self.data["data"]["user"]["contributionsCollection"]["contributionCalendar"]["weeks"]:
-            for day in week["contributionDays"]:
-                data.append(
-                    {"date": day["date"], "contribution": day["contributionCount"]})
-        df: pd.DataFrame = pd.DataFrame(data)
-        df.date = pd.to_datetime(df.date, infer_datetime_format=True)
-        df['day'] = [df.iloc[i].date.day_name() for i in range(len(df))]
-        df['month'] = [df.iloc[i].date.month_name() for i in range(len(df))]
+        return self.build_frame(*self.columns)
+
+    @staticmethod
+    def build_frame(dates: np.ndarray, counts: np.ndarray) -> pd.DataFrame:
+        df: pd.DataFrame = pd.DataFrame(
+            {"date": pd.to_datetime(dates), "contribution": counts})
+        df['day'] = pd.Categorical(
+            df.date.dt.day_name(), categories=WEEKDAYS)
+        df['month'] = pd.Categorical(
+            df.date.dt.month_name(), categories=MONTHS)
         return df
 
     def most_contribution_day(self) -> pd.DataFrame:
@@ -104,14 +400,14 @@ class Statistics:
         return self.tf_data.contribution.mean()
 
     def weekday_contributions(self) -> pd.DataFrame:
-        return self.tf_data.groupby(by="day").sum().sort_values(by=['contribution'], ascending=False)
+        return self.index["day"]
 
     def most_weekday_contributions(self) -> pd.Series:
         df: pd.DataFrame = self.weekday_contributions()
         return df.iloc[0]
 
     def month_contributions(self) -> pd.DataFrame:
-        return self.tf_data.groupby(by="month").sum().sort_values(by=['contribution'], ascending=False)
+        return self.index["month"]
 
     def most_month_contributions(self) -> pd.Series:
         df: pd.DataFrame = self.month_contributions()
@@ -121,6 +417,9 @@ class Statistics:
         df: pd.DataFrame = self.month_contributions()
         return df.iloc[-1]
 
+    def week_contributions(self) -> pd.DataFrame:
+        return self.index["week"]
+
     def average_contribution_per_month(self) -> int:
         return round(self.total_contributions/12)
 
@@ -128,22 +427,43 @@ class Statistics:
         return round(self.total_contributions/52)
 
 
+def as_rows(*columns: np.ndarray) -> tuple[tuple[int, ...], ...]:
+    return tuple(map(tuple, np.column_stack(columns).tolist()))
+
+
 class ML:
-    def __init__(self, raw_data: dict, max_compare_length: int = 20) -> None:
-        self.raw_data: dict = raw_data
-        self.model: Predictor = NONE_PREDICTOR
+    def __init__(self, raw_data: Union[dict, ContributionCalendar], max_compare_length: int = 20,
+                 registry: Optional[ModelRegistry] = None, username: str = "") -> None:
+        self.raw_data: Union[dict, ContributionCalendar] = raw_data
+        self.calendar: ContributionCalendar = ContributionCalendar.of(
+            raw_data)
+        self.model: "Predictor" = regression().NONE_PREDICTOR
         self.max_compare_length: int = max_compare_length
+        self.registry: Optional[ModelRegistry] = registry
+        self.username: str = username
         self.get_model()
 
+    @property
+    def trained(self) -> bool:
+        return self.model is not regression().NONE_PREDICTOR
+
     def data_prep(self) -> tuple[tuple, tuple]:
         return (tuple(), tuple())
 
     def get_model(self):
-        prepared = self.data_prep()
+        with DATA_PREP_SECONDS.time(model=type(self).__name__):
+            prepared = self.data_prep()
         if prepared[0]:
             x, y = prepared
-            self.model = BestModel(
+            key: str = ModelRegistry.fingerprint(
+                type(self).__name__, self.max_compare_length, x, y)
+            if self.registry is not None and (model := self.registry.load(self.username, key)) is not None:
+                self.model = model
+                return
+            self.model = regression().BestModel(
                 x, y, self.max_compare_length).compute_best_model()
+            if self.registry is not None:
+                self.registry.save(self.username, key, self.model)
             return
         print("[warning]: self.data_prep() returned empty list")
 
@@ -153,32 +473,26 @@ class PredictNext(ML):
      Predict when the date of next contribution: use distance between contributions as training data
     """
 
-    def __init__(self, raw_data: dict) -> None:
+    def __init__(self, raw_data: Union[dict, ContributionCalendar], registry: Optional[ModelRegistry] = None,
+                 username: str = "") -> None:
         self.last: int = 1
         self.max_result_days: int = 365
-        super().__init__(raw_data=raw_data)
+        super().__init__(raw_data=raw_data, registry=registry, username=username)
 
     def data_prep(self) -> tuple[tuple[tuple[int, int, int], ...], tuple[int, ...]]:
-
-        x_series: list[tuple[int, int, int]] = []
-        y_series: list[int] = []
-        diff: int = 0
-        for week in self.raw_data["data"]["user"]["contributionsCollection"]["contributionCalendar"]["weeks"]:
-            for day in week["contributionDays"]:
-                date: dt.datetime = dt.datetime.strptime(
-                    day["date"], '%Y-%m-%d')
-                x_series.append((date.month, date.day, self.last))
-                if day["contributionCount"] == 0:
-                    diff += 1
-                    y_series.append(diff)
-                else:
-                    diff = 0
-                    y_series.append(diff)
-                self.last += 1
-        return tuple(x_series), tuple(y_series)
+        cal: ContributionCalendar = self.calendar
+        index: np.ndarray = np.arange(len(cal))
+        active: np.ndarray = cal.counts != 0
+        # days since the last contribution (0 on days with contributions)
+        last_active: np.ndarray = np.maximum.accumulate(
+            np.where(active, index, -1))
+        y_series: np.ndarray = np.where(active, 0, index - last_active)
+        x_series = as_rows(cal.month, cal.day, index + self.last)
+        self.last += len(cal)
+        return x_series, tuple(y_series.tolist())
 
     def predict_next(self) -> dict[str, Any]:
-        if self.model is not NONE_PREDICTOR:
+        if self.trained:
             tomorrow: dt.datetime = dt.datetime.now() + dt.timedelta(days=1)
             input_data: tuple[tuple[int, int, int]] = (
                 (tomorrow.month, tomorrow.day, self.last),)
@@ -196,10 +510,12 @@ class PredictTotalWeek(ML):
     Predict total contributions for a given week
     """
 
-    def __init__(self, raw_data) -> None:
-        super().__init__(raw_data=raw_data)
+    def __init__(self, raw_data: Union[dict, ContributionCalendar], registry: Optional[ModelRegistry] = None,
+                 username: str = "") -> None:
+        super().__init__(raw_data=raw_data, registry=registry, username=username)
 
-    def week_of_month(self, date_time: dt.datetime) -> int:
+    @staticmethod
+    def week_of_month(date_time: dt.datetime) -> int:
         """
         Returns the week of the month for the specified date.
         """
@@ -209,36 +525,16 @@ class PredictTotalWeek(ML):
 
         return int(ceil(adjusted_dom/7.0))
 
-    def data_prep(self):  # tuple[tuple[tuple[int], ...], tuple[int, ...]]
-        x_series: list[tuple[int, ...]] = []
-        y_series: list[int] = []
-        current_week_date: dt.datetime = NONE_DATE
-        current_week_contribution: int = 0
-
-        for week in self.raw_data["data"]["user"]["contributionsCollection"]["contributionCalendar"]["weeks"]:
-            for day in week["contributionDays"]:
-                date = dt.datetime.strptime(day["date"], '%Y-%m-%d')
-                if current_week_date is NONE_DATE:
-                    current_week_date = date
-                # If dates are in same week
-                if date.isocalendar()[1] == current_week_date.isocalendar()[1]:
-                    current_week_contribution += day["contributionCount"]
-                else:
-                    if current_week_contribution == 0:
-                        current_week_date = date
-                        continue
-                    row: list[int] = [self.week_of_month(current_week_date), current_week_date.isocalendar()[
-                        1], current_week_date.month]
-                    x_series.append(tuple(row))
-                    y_series.append(current_week_contribution)
-                    # reset current week contribution
-                    current_week_contribution = day["contributionCount"]
-                    current_week_date = date
-        self.max_week_contribution = max(y_series)
-        return tuple(x_series), tuple(y_series)
+    def data_prep(self) -> tuple[tuple[tuple[int, int, int], ...], tuple[int, ...]]:
+        cal: ContributionCalendar = self.calendar
+        starts, totals = cal.period_totals(cal.iso_week)
+        self.max_week_contribution = int(totals.max())
+        x_series = as_rows(cal.week_of_month[starts],
+                           cal.iso_week[starts], cal.month[starts])
+        return x_series, tuple(totals.tolist())
 
     def predict_week(self, week_date: dt.datetime) -> dict[str, Any]:
-        if self.model is not NONE_PREDICTOR:
+        if self.trained:
             row = (self.week_of_month(week_date), week_date.isocalendar()[
                 1], week_date.month)
             input_data: tuple = (row,)
@@ -249,44 +545,41 @@ class PredictTotalWeek(ML):
             return {"totalPredictedContribution": result, "weekdate": week_date}
         return {"error": "model is None"}
 
+    def forecast_weeks(self, start: dt.datetime, n: int) -> list[dict[str, Any]]:
+        """
+        Predict the `n` weeks starting at `start` with a single batched model call
+        """
+        if not self.trained:
+            return [{"error": "model is None"}]
+        week_dates: list[dt.datetime] = [
+            start + dt.timedelta(weeks=i) for i in range(n)]
+        cal: ContributionCalendar = ContributionCalendar(
+            np.array([d.date() for d in week_dates], dtype="datetime64[D]"), np.zeros(n))
+        raw_result: np.ndarray = self.model.predict_many(
+            np.column_stack((cal.week_of_month, cal.iso_week, cal.month)))
+        result: np.ndarray = np.abs(np.round(raw_result))
+        # clamp before the int cast: polynomial extrapolation can overflow int64
+        result[~(result <= 2*self.max_week_contribution)] = 0
+        return [{"totalPredictedContribution": int(r), "weekdate": d} for r, d in zip(result, week_dates)]
+
 
 class PredictTotalMonth(ML):
     """
     Predict total contributions for a given month
     """
 
-    def __init__(self, raw_data: dict) -> None:
-        super().__init__(raw_data=raw_data)
+    def __init__(self, raw_data: Union[dict, ContributionCalendar], registry: Optional[ModelRegistry] = None,
+                 username: str = "") -> None:
+        super().__init__(raw_data=raw_data, registry=registry, username=username)
 
-    def data_prep(self):
-        x_series: list[tuple[int]] = []
-        y_series: list[int] = []
-        current_month = None
-        current_month_contribution: int = 0
-
-        for week in self.raw_data["data"]["user"]["contributionsCollection"]["contributionCalendar"]["weeks"]:
-            for day in week["contributionDays"]:
-                date = dt.datetime.strptime(day["date"], '%Y-%m-%d')
-                if current_month is None:
-                    current_month = date.month
-                # If dates are in same month
-                if date.month == current_month:
-                    current_month_contribution += day["contributionCount"]
-                else:
-                    if current_month_contribution == 0:
-                        current_month = date.month
-                        continue
-                    row: list[int] = [current_month]
-                    x_series.append(tuple(row))
-                    y_series.append(current_month_contribution)
-                    # reset current month contribution
-                    current_month_contribution = day["contributionCount"]
-                    current_month = date.month
-        self.max_month_contribution = max(y_series)
-        return tuple(x_series), tuple(y_series)
+    def data_prep(self) -> tuple[tuple[tuple[int], ...], tuple[int, ...]]:
+        cal: ContributionCalendar = self.calendar
+        starts, totals = cal.period_totals(cal.month)
+        self.max_month_contribution = int(totals.max())
+        return as_rows(cal.month[starts]), tuple(totals.tolist())
 
     def predict_month(self, month: int) -> dict[str, Any]:
-        if self.model is not NONE_PREDICTOR:
+        if self.trained:
             input_data: tuple[int] = (month,)
             raw_result = self.model.predict(input_data)
             result = abs(round(raw_result[0]))
@@ -295,26 +588,44 @@ class PredictTotalMonth(ML):
             return {"totalPredictedContribution": result, "month": month}
         return {"error": "model is None"}
 
+    def forecast_months(self, months: Iterable[int] = range(1, 13)) -> list[dict[str, Any]]:
+        """
+        Predict every month in `months` with a single batched model call
+        """
+        if not self.trained:
+            return [{"error": "model is None"}]
+        month_array: np.ndarray = np.fromiter(months, dtype=np.int64)
+        raw_result: np.ndarray = self.model.predict_many(
+            month_array.reshape(-1, 1))
+        result: np.ndarray = np.abs(np.round(raw_result))
+        result[~(result <= 3*self.max_month_contribution)] = 0
+        return [{"totalPredictedContribution": int(r), "month": int(m)} for r, m in zip(result, month_array)]
+
 
 class PredictTotalYear:
     """
     Predict total contributions for the current year
     """
 
-    def __init__(self, raw_data: dict) -> None:
-        self.raw_data: dict = raw_data
+    def __init__(self, raw_data: Union[dict, ContributionCalendar], registry: Optional[ModelRegistry] = None,
+                 username: str = "") -> None:
+        self.raw_data: Union[dict, ContributionCalendar] = raw_data
         self.monthModel: PredictTotalMonth = PredictTotalMonth(
-            raw_data=raw_data)
+            raw_data=ContributionCalendar.of(raw_data), registry=registry, username=username)
+
+    def forecast_months(self, months: Iterable[int] = range(1, 13)) -> list[dict[str, Any]]:
+        return self.monthModel.forecast_months(months)
 
     def predict(self) -> dict[str, int]:
-        def get_value(no): return abs(
-            round(self.monthModel.predict_month(no)["totalPredictedContribution"]))
-        result = sum(get_value(i) for i in range(1, 13))
+        forecast: list[dict[str, Any]] = self.forecast_months()
+        if "error" in forecast[0]:
+            return forecast[0]
+        result = sum(month["totalPredictedContribution"] for month in forecast)
         return {"totalPredictedContribution": result, "year": dt.datetime.now().year}
 
 
 if __name__ == "__main__":
-    obj = Contributions()
+    obj = Contributions(cache=cache_from_env(default="sqlite"))
     dd = obj.get_query("emylincon")
     # tr = Statistics(dd)
     # print(tr.most_contribution_day())
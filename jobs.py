@@ -0,0 +1,102 @@
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Iterable, Iterator, Optional, TypeVar
+from cache import MemoryCache
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def imap_unordered(func: Callable[[T], R], items: Iterable[T], max_workers: int = 8) -> Iterator[R]:
+    """
+    Yield func(item) in completion order, with at most `max_workers` items in flight
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending: set[Future] = set()
+        for item in items:
+            if len(pending) >= max_workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+            pending.add(executor.submit(func, item))
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+class PoolFull(Exception):
+    pass
+
+
+class TrainingPool:
+    """
+    Bounded background pool for model training. Jobs are keyed, so concurrent submissions
+    of the same key share one run, and finished results are kept for `result_ttl` seconds.
+    A job that raises or returns {"error": ...} is not cached: its error is reported to the
+    next submission of the key, and the one after that starts a new run.
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 64, result_ttl: float = 600,
+                 max_results: int = 1024) -> None:
+        self.executor: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="training")
+        self.max_pending: int = max_pending
+        self.max_results: int = max_results
+        self.results: MemoryCache = MemoryCache(
+            ttl=result_ttl, max_size=max_results)
+        self.errors: dict[str, dict[str, Any]] = {}
+        self.running: dict[str, Future] = {}
+        self.lock: threading.Lock = threading.Lock()
+
+    def status(self, key: str) -> dict[str, Any]:
+        if (result := self.results.get(key)) is not None:
+            return result
+        with self.lock:
+            if key in self.running:
+                return {"job": key, "status": "pending"}
+            if key in self.errors:
+                return self.errors[key]
+        return {"job": key, "status": "unknown"}
+
+    def submit(self, key: str, func: Callable[[], Any]) -> dict[str, Any]:
+        """
+        Finished result for `key` if there is one, or the error of its last run (once),
+        otherwise start (or join) its job
+        """
+        if (result := self.results.get(key)) is not None:
+            return result
+        with self.lock:
+            if (error := self.errors.pop(key, None)) is not None:
+                return error
+            if key not in self.running:
+                if len(self.running) >= self.max_pending:
+                    raise PoolFull(f"{len(self.running)} training jobs pending")
+                self.running[key] = self.executor.submit(self.run, key, func)
+        return {"job": key, "status": "pending"}
+
+    def run(self, key: str, func: Callable[[], Any]) -> None:
+        failure: Optional[str] = None
+        try:
+            result: Any = func()
+            if isinstance(result, dict) and "error" in result:
+                failure = str(result["error"])
+            else:
+                self.results.set(key, {"job": key, "status": "done", "result": result})
+        except Exception as error:
+            failure = str(error)
+        finally:
+            with self.lock:
+                if failure is not None:
+                    self.errors[key] = {"job": key, "status": "error", "error": failure}
+                    # errors nobody polls for: drop the oldest
+                    while len(self.errors) > self.max_results:
+                        del self.errors[next(iter(self.errors))]
+                del self.running[key]
+
+    def wait(self, key: str, timeout: Optional[float] = None) -> dict[str, Any]:
+        with self.lock:
+            future: Optional[Future] = self.running.get(key)
+        if future is not None:
+            future.result(timeout=timeout)
+        return self.status(key)
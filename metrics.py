@@ -0,0 +1,182 @@
+"""
+Minimal Prometheus text-format metrics: counters, histograms and callback gauges kept in
+a `MetricsRegistry` and rendered by `/metrics`.
+"""
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+CONTENT_TYPE: str = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS: tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS: tuple[float, ...] = tuple(float(4 ** i * 256) for i in range(9))  # 256 B .. 16 MiB
+
+Labels = tuple[str, ...]
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def format_labels(names: Labels, values: Labels) -> str:
+    if not names:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for v in values)
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, escaped)) + "}"
+
+
+class Metric:
+    kind: str = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Labels = ()) -> None:
+        self.name: str = name
+        self.documentation: str = documentation
+        self.labelnames: Labels = tuple(labelnames)
+        self.lock: threading.Lock = threading.Lock()
+
+    def key(self, labels: dict[str, str]) -> Labels:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterator[tuple[str, Labels, Labels, float]]:
+        """
+        (sample name, label names, label values, value) rows
+        """
+        return iter(())
+
+    def render(self) -> str:
+        lines: list[str] = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines += [f"{name}{format_labels(names, values)} {format_value(value)}"
+                  for name, names, values, value in self.samples()]
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Labels = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.values: dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key: Labels = self.key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self.values.get(self.key(labels), 0)
+
+    def samples(self) -> Iterator[tuple[str, Labels, Labels, float]]:
+        with self.lock:
+            items = sorted(self.values.items())
+        for values, value in items:
+            yield self.name, self.labelnames, values, value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Labels = (),
+                 buckets: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets: tuple[float, ...] = tuple(sorted(buckets)) + (float("inf"),)
+        # per label set: [count per bucket (not cumulative)], sum
+        self.values: dict[Labels, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key: Labels = self.key(labels)
+        with self.lock:
+            counts, total = self.values.setdefault(key, ([0] * len(self.buckets), [0.0]))
+            counts[bisect_left(self.buckets, value)] += 1
+            total[0] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        start: float = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: str) -> int:
+        entry = self.values.get(self.key(labels))
+        return sum(entry[0]) if entry else 0
+
+    def samples(self) -> Iterator[tuple[str, Labels, Labels, float]]:
+        with self.lock:
+            items = sorted((key, (list(counts), total[0])) for key, (counts, total) in self.values.items())
+        names: Labels = self.labelnames + ("le",)
+        for values, (counts, total) in items:
+            cumulative: int = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                yield f"{self.name}_bucket", names, values + (format_value(bound),), cumulative
+            yield f"{self.name}_sum", self.labelnames, values, total
+            yield f"{self.name}_count", self.labelnames, values, cumulative
+
+
+class CallbackGauge(Metric):
+    """
+    Read at scrape time, e.g. from a cache's stats()
+    """
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Labels,
+                 collect: Callable[[], dict[Labels, float]]) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.collect: Callable[[], dict[Labels, float]] = collect
+
+    def samples(self) -> Iterator[tuple[str, Labels, Labels, float]]:
+        for values, value in sorted(self.collect().items()):
+            yield self.name, self.labelnames, values, value
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self.metrics: dict[str, Metric] = {}
+        self.lock: threading.Lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self.lock:
+            if metric.name in self.metrics:
+                raise ValueError(f"metric {metric.name} is already registered")
+            self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Labels = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Labels = (),
+                  buckets: tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name: str, documentation: str, labelnames: Labels,
+              collect: Callable[[], dict[Labels, float]]) -> CallbackGauge:
+        return self.register(CallbackGauge(name, documentation, labelnames, collect))
+
+    def render(self) -> str:
+        with self.lock:
+            metrics: list[Metric] = list(self.metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY: MetricsRegistry = MetricsRegistry()
+GRAPHQL_SECONDS: Histogram = REGISTRY.histogram(
+    "github_graphql_request_seconds", "GraphQL POST round trip including retries", ("status",))
+GRAPHQL_DECODE_SECONDS: Histogram = REGISTRY.histogram(
+    "github_graphql_decode_seconds", "JSON decode of a GraphQL response")
+GRAPHQL_RESPONSE_BYTES: Histogram = REGISTRY.histogram(
+    "github_graphql_response_bytes", "Size of GraphQL response bodies", buckets=SIZE_BUCKETS)
+QUERY_CACHE: Counter = REGISTRY.counter(
+    "github_query_cache_total", "Contributions.get_query cache lookups", ("result",))
+STATISTICS_SECONDS: Histogram = REGISTRY.histogram(
+    "statistics_build_seconds", "Statistics construction: calendar flattening and DataFrame build")
+DATA_PREP_SECONDS: Histogram = REGISTRY.histogram(
+    "ml_data_prep_seconds", "Training set preparation per model", ("model",))
+BEST_MODEL_SECONDS: Histogram = REGISTRY.histogram(
+    "best_model_seconds", "BestModel.compute_best_model degree search and refit")
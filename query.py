@@ -0,0 +1,58 @@
+import datetime as dt
+from typing import Any, Iterable
+
+DATE_FORMAT: str = '%Y-%m-%dT%H:%M:%SZ'
+USER_FIELDS: tuple[str, ...] = ("email", "createdAt")
+DAY_FIELDS: tuple[str, ...] = ("weekday", "date", "contributionCount", "color")
+MONTH_FIELDS: tuple[str, ...] = ("name", "year", "firstDay", "totalWeeks")
+
+
+class QueryBuilder:
+    """
+    Contribution calendar query compiled once for a chosen set of fields;
+    the login and date range are sent as GraphQL variables
+    """
+
+    def __init__(self, day_fields: Iterable[str] = DAY_FIELDS, user_fields: Iterable[str] = USER_FIELDS,
+                 month_fields: Iterable[str] = MONTH_FIELDS, rate_limit: bool = True) -> None:
+        self.day_fields: tuple[str, ...] = self.check(day_fields, DAY_FIELDS)
+        self.user_fields: tuple[str, ...] = self.check(user_fields, USER_FIELDS)
+        self.month_fields: tuple[str, ...] = self.check(month_fields, MONTH_FIELDS)
+        for required in ("date", "contributionCount"):
+            if required not in self.day_fields:
+                raise ValueError(f"day field '{required}' is required")
+        self.rate_limit: bool = rate_limit
+        self.query: str = self.compile()
+
+    @staticmethod
+    def check(fields: Iterable[str], allowed: tuple[str, ...]) -> tuple[str, ...]:
+        fields = tuple(fields)
+        if (unknown := set(fields) - set(allowed)):
+            raise ValueError(f"unknown fields {sorted(unknown)}, expected some of {allowed}")
+        return fields
+
+    @property
+    def key(self) -> str:
+        """
+        Identifies the projection, e.g. to keep cached responses of different shapes apart
+        """
+        return "|".join((",".join(self.user_fields), ",".join(self.day_fields), ",".join(self.month_fields)))
+
+    def compile(self) -> str:
+        months: str = f" months {{ {' '.join(self.month_fields)} }}" if self.month_fields else ""
+        rate_limit: str = " rateLimit { cost remaining resetAt }" if self.rate_limit else ""
+        return ("query($login: String!, $from: DateTime, $to: DateTime) {"
+                f"{rate_limit}"
+                f" user(login: $login) {{ {' '.join(self.user_fields)}"
+                " contributionsCollection(from: $from, to: $to) { contributionCalendar { totalContributions"
+                f" weeks {{ contributionDays {{ {' '.join(self.day_fields)} }} }}{months} }} }} }} }}")
+
+    def build(self, username: str, start: dt.datetime, end: dt.datetime) -> dict[str, Any]:
+        return {"query": self.query, "variables": {
+            "login": username, "from": start.strftime(DATE_FORMAT), "to": end.strftime(DATE_FORMAT)}}
+
+
+FULL_QUERY: QueryBuilder = QueryBuilder()
+# just what Statistics, the ML models and history merging read
+STATS_QUERY: QueryBuilder = QueryBuilder(
+    day_fields=("date", "contributionCount"), user_fields=("createdAt",), month_fields=())
@@ -0,0 +1,94 @@
+import time
+import threading
+import datetime as dt
+from typing import Any, Optional
+import requests
+
+
+class RateLimitExceeded(Exception):
+    pass
+
+
+class TokenBudget:
+    def __init__(self, token: str, limit: int = 5000) -> None:
+        self.token: str = token
+        self.limit: int = limit
+        self.remaining: int = limit
+        self.reset_at: float = 0.0
+        # until a response carries X-RateLimit-* headers the budget is only an estimate:
+        # nothing would ever refill it, so it is tracked but not enforced
+        self.observed: bool = False
+
+    def affords(self, cost: int) -> bool:
+        return not self.observed or self.remaining >= cost
+
+    def refresh(self, now: float) -> None:
+        if self.reset_at and self.reset_at <= now:
+            self.remaining, self.reset_at = self.limit, 0.0
+
+
+class TokenPool:
+    """
+    GraphQL point budget per token. Every submission reserves the estimated query cost from
+    the token with the most points left; when no token can afford it, callers wait for the
+    earliest reset (up to `max_wait` seconds) instead of being answered 403. A budget is only
+    enforced once the server has reported it through X-RateLimit-* headers.
+    """
+
+    def __init__(self, tokens: list[str], max_wait: float = 60, limit: int = 5000) -> None:
+        self.budgets: dict[str, TokenBudget] = {
+            token: TokenBudget(token, limit) for token in (tokens or [""])}
+        self.max_wait: float = max_wait
+        self.cost: int = 1
+        self.condition: threading.Condition = threading.Condition()
+
+    def acquire(self, cost: Optional[int] = None) -> str:
+        deadline: float = time.monotonic() + self.max_wait
+        with self.condition:
+            while True:
+                now: float = time.time()
+                for budget in self.budgets.values():
+                    budget.refresh(now)
+                need: int = self.cost if cost is None else cost
+                affordable: list[TokenBudget] = [b for b in self.budgets.values() if b.affords(need)]
+                if affordable:
+                    best: TokenBudget = max(affordable, key=lambda b: b.remaining)
+                    best.remaining -= need
+                    return best.token
+                resets: list[float] = [
+                    b.reset_at for b in self.budgets.values() if b.reset_at]
+                wait: float = max(0.0, min(resets) - now) if resets else 1.0
+                if time.monotonic() + wait > deadline:
+                    raise RateLimitExceeded(
+                        f"GraphQL budget exhausted on {len(self.budgets)} token(s)")
+                self.condition.wait(timeout=wait)
+
+    def observe(self, token: str, response: requests.Response) -> None:
+        """
+        Sync a token's budget with the X-RateLimit-* headers GitHub sends on every response
+        """
+        headers = response.headers
+        if "X-RateLimit-Remaining" not in headers:
+            return
+        with self.condition:
+            budget: TokenBudget = self.budgets[token]
+            budget.observed = True
+            budget.remaining = int(headers["X-RateLimit-Remaining"])
+            budget.limit = int(headers.get("X-RateLimit-Limit", budget.limit))
+            if "X-RateLimit-Reset" in headers:
+                budget.reset_at = float(headers["X-RateLimit-Reset"])
+            self.condition.notify_all()
+
+    def observe_rate_limit(self, rate_limit: dict[str, Any]) -> None:
+        """
+        Use the `rateLimit { cost }` of a query result as the cost estimate of the next ones
+        """
+        if (cost := rate_limit.get("cost")) is not None:
+            with self.condition:
+                self.cost = max(1, int(cost))
+
+    def stats(self) -> list[dict[str, Any]]:
+        with self.condition:
+            return [{"token": f"...{b.token[-4:]}", "remaining": b.remaining, "limit": b.limit,
+                     "reset_at": dt.datetime.fromtimestamp(b.reset_at).isoformat() if b.reset_at else None}
+                    for b in self.budgets.values()]
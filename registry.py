@@ -0,0 +1,69 @@
+import os
+import json
+import hashlib
+import threading
+from typing import TYPE_CHECKING, Any, Optional
+
+if TYPE_CHECKING:
+    from Regression import Predictor
+
+
+class ModelRegistry:
+    """
+    Trained predictors on disk, keyed by user and a fingerprint of the training data,
+    capped at `max_entries` files with least recently used eviction
+    """
+
+    def __init__(self, path: str = ".cache/models", max_entries: int = 512) -> None:
+        os.makedirs(path, exist_ok=True)
+        self.path: str = path
+        self.max_entries: int = max_entries
+        self.hits: int = 0
+        self.misses: int = 0
+        self.lock: threading.Lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(*parts: Any) -> str:
+        return hashlib.sha256(json.dumps(parts, default=str).encode()).hexdigest()[:32]
+
+    def file(self, username: str, key: str) -> str:
+        safe: str = "".join(c for c in username.lower() if c.isalnum() or c in "-_")
+        return os.path.join(self.path, f"{safe or '_'}-{key}.json")
+
+    def load(self, username: str, key: str) -> Optional["Predictor"]:
+        path: str = self.file(username, key)
+        try:
+            with open(path) as file_tmp:
+                state: dict = json.load(file_tmp)
+            os.utime(path)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        from Regression import Predictor
+        return Predictor.from_dict(state)
+
+    def save(self, username: str, key: str, predictor: "Predictor") -> None:
+        path: str = self.file(username, key)
+        tmp: str = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w") as file_tmp:
+            json.dump(predictor.to_dict(), file_tmp)
+        os.replace(tmp, path)
+        self.evict()
+
+    def evict(self) -> None:
+        with self.lock:
+            entries: list[os.DirEntry] = [
+                e for e in os.scandir(self.path) if e.name.endswith(".json")]
+            if len(entries) <= self.max_entries:
+                return
+            entries.sort(key=lambda e: e.stat().st_mtime)
+            for entry in entries[:len(entries) - self.max_entries]:
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses,
+                "size": sum(1 for e in os.scandir(self.path) if e.name.endswith(".json"))}
@@ -0,0 +1,77 @@
+import random
+import time
+import email.utils
+from typing import Optional
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUSES: frozenset[int] = frozenset({429, 500, 502, 503, 504})
+
+
+def build_session(pool_size: int = 10, headers: Optional[dict] = None) -> requests.Session:
+    """
+    Keep-alive session whose connections are pooled per host
+    """
+    session: requests.Session = requests.Session()
+    adapter: HTTPAdapter = HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Accept-Encoding": "gzip, deflate"})
+    session.headers.update(headers or {})
+    return session
+
+
+def should_retry(response: requests.Response) -> bool:
+    if response.status_code in RETRY_STATUSES:
+        return True
+    # GitHub reports secondary rate limits as 403 with a Retry-After header or message
+    return response.status_code == 403 and (
+        "Retry-After" in response.headers or b"secondary rate limit" in response.content.lower())
+
+
+def is_rate_limited(response: requests.Response) -> bool:
+    """
+    Primary rate limit: the token's point budget is spent until X-RateLimit-Reset
+    """
+    return response.status_code in (403, 429) and response.headers.get("X-RateLimit-Remaining") == "0"
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        # malformed header: fall back to jittered backoff
+        return None
+    return max(0.0, parsed.timestamp() - time.time())
+
+
+def retry_delay(attempt: int, backoff: float, response: Optional[requests.Response] = None,
+                max_delay: float = 60) -> float:
+    """
+    Retry-After when the server sends one, otherwise full-jitter exponential backoff
+    """
+    if response is not None and (after := parse_retry_after(response.headers.get("Retry-After"))) is not None:
+        return min(after, max_delay)
+    return random.uniform(0, min(max_delay, backoff * 2 ** attempt))
+
+
+def connection_stats(session: requests.Session) -> dict[str, int]:
+    """
+    Requests sent vs connections opened across every pool of the session
+    """
+    sent: int = 0
+    opened: int = 0
+    for adapter in set(session.adapters.values()):
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools[key]
+            sent += pool.num_requests
+            opened += pool.num_connections
+    return {"requests": sent, "connections": opened, "reused": sent - opened}
@@ -0,0 +1,165 @@
+import os
+import sqlite3
+import threading
+import datetime as dt
+from typing import Optional
+import numpy as np
+from github import Contributions, year_windows, merge_calendars
+from query import DATE_FORMAT
+from contribution_calendar import ContributionCalendar
+from calendar_archive import CalendarArchive
+
+# what a single get_query returns: today and the 365 days before it
+TRAILING_DAYS: int = 365
+
+
+class ContributionStore:
+    """
+    Persistent per-user daily contribution counts, kept up to date with delta syncs
+    """
+
+    def __init__(self, path: str = ".cache/contributions.sqlite", overlap_days: int = 7, max_age: float = 300) -> None:
+        if (directory := os.path.dirname(path)):
+            os.makedirs(directory, exist_ok=True)
+        self.overlap_days: int = overlap_days
+        self.max_age: float = max_age
+        self.lock: threading.Lock = threading.Lock()
+        self.conn: sqlite3.Connection = sqlite3.connect(
+            path, check_same_thread=False)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS users (username TEXT PRIMARY KEY, email TEXT, created_at TEXT, synced_at TEXT,
+                                              history INTEGER NOT NULL DEFAULT 0);
+            CREATE TABLE IF NOT EXISTS days (
+                username TEXT, date TEXT, count INTEGER, PRIMARY KEY (username, date)) WITHOUT ROWID;
+        """)
+        # stores created before the history flag existed
+        if "history" not in [row[1] for row in self.conn.execute("PRAGMA table_info(users)")]:
+            self.conn.execute("ALTER TABLE users ADD COLUMN history INTEGER NOT NULL DEFAULT 0")
+        self.conn.commit()
+
+    def first_date(self, username: str) -> Optional[dt.date]:
+        row = self.conn.execute(
+            "SELECT MIN(date) FROM days WHERE username = ?", (username.lower(),)).fetchone()
+        return None if row[0] is None else dt.date.fromisoformat(row[0])
+
+    def last_date(self, username: str) -> Optional[dt.date]:
+        row = self.conn.execute(
+            "SELECT MAX(date) FROM days WHERE username = ?", (username.lower(),)).fetchone()
+        return None if row[0] is None else dt.date.fromisoformat(row[0])
+
+    def synced_at(self, username: str) -> Optional[dt.datetime]:
+        row = self.conn.execute(
+            "SELECT synced_at FROM users WHERE username = ?", (username.lower(),)).fetchone()
+        return None if row is None else dt.datetime.fromisoformat(row[0])
+
+    def created_at(self, username: str) -> dt.datetime:
+        row = self.conn.execute(
+            "SELECT created_at FROM users WHERE username = ?", (username.lower(),)).fetchone()
+        return dt.datetime.strptime(row[0], DATE_FORMAT)
+
+    def has_history(self, username: str) -> bool:
+        """
+        Whether every day since the account was created has been loaded
+        """
+        row = self.conn.execute(
+            "SELECT history FROM users WHERE username = ?", (username.lower(),)).fetchone()
+        return bool(row and row[0])
+
+    def mark_history(self, username: str) -> None:
+        with self.lock:
+            self.conn.execute("UPDATE users SET history = 1 WHERE username = ?", (username.lower(),))
+            self.conn.commit()
+
+    def upsert(self, username: str, payload: dict) -> int:
+        user: dict = payload["data"]["user"]
+        rows: list[tuple[str, str, int]] = [
+            (username.lower(), day["date"], day["contributionCount"])
+            for week in user["contributionsCollection"]["contributionCalendar"]["weeks"]
+            for day in week["contributionDays"]]
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO days VALUES (?, ?, ?)", rows)
+            self.conn.execute("""
+                INSERT INTO users (username, email, created_at, synced_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT (username) DO UPDATE SET
+                    email = excluded.email, created_at = excluded.created_at, synced_at = excluded.synced_at
+            """, (username.lower(), user.get("email", ""), user.get("createdAt", ""), dt.datetime.now().isoformat()))
+            self.conn.commit()
+        return len(rows)
+
+    def read(self, username: str, days: Optional[int] = TRAILING_DAYS) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Stored (dates, counts) of the trailing `days` days, like a get_query window;
+        the whole stored history when `days` is None
+        """
+        since: str = "" if days is None else (dt.date.today() - dt.timedelta(days=days)).isoformat()
+        rows: list[tuple[str, int]] = self.conn.execute(
+            "SELECT date, count FROM days WHERE username = ? AND date >= ? ORDER BY date",
+            (username.lower(), since)).fetchall()
+        dates: np.ndarray = np.array([row[0] for row in rows], dtype="datetime64[D]")
+        counts: np.ndarray = np.array([row[1] for row in rows], dtype=np.int32)
+        return dates, counts
+
+    def usernames(self) -> list[str]:
+        return [row[0] for row in self.conn.execute("SELECT username FROM users ORDER BY username")]
+
+    def export(self, path: str) -> CalendarArchive:
+        """
+        Snapshot every stored user into a memory-mapped CalendarArchive at `path`
+        """
+        return CalendarArchive.write(path, {username: ContributionCalendar(*self.read(username, days=None))
+                                            for username in self.usernames()})
+
+    def to_payload(self, username: str, days: Optional[int] = TRAILING_DAYS) -> dict:
+        """
+        Stored days in the GraphQL payload shape expected by Statistics and the ML models:
+        the trailing year by default, so delta syncs do not widen what callers see
+        """
+        user = self.conn.execute(
+            "SELECT email, created_at FROM users WHERE username = ?", (username.lower(),)).fetchone()
+        if user is None:
+            return {"error": f"user '{username}' is not in the store"}
+        dates, counts = self.read(username, days)
+        rows: list[dict] = [
+            {"weekday": (date.weekday() + 1) % 7, "date": date.isoformat(), "contributionCount": int(count)}
+            for date, count in zip(dates.tolist(), counts.tolist())]
+        return merge_calendars([{"data": {"user": {
+            "email": user[0], "createdAt": user[1],
+            "contributionsCollection": {"contributionCalendar": {"weeks": [{"contributionDays": rows}]}}}}}])
+
+    def sync(self, contributions: Contributions, username: str, history: bool = False) -> dict:
+        """
+        Fetch only the days since the last stored date (plus an overlap for late-arriving counts).
+        The first sync of a user loads the last year, or the full history when `history` is set;
+        a user first synced without `history` is backfilled to its creation date the first time
+        `history` is asked for. Users synced less than `max_age` seconds ago are served from the
+        store without a fetch. Returns the trailing year, or every stored day when `history` is set.
+        """
+        days: Optional[int] = None if history else TRAILING_DAYS
+        backfill: bool = history and not self.has_history(username)
+        synced: Optional[dt.datetime] = self.synced_at(username)
+        if not backfill and synced is not None and (dt.datetime.now() - synced).total_seconds() < self.max_age:
+            return self.to_payload(username, days)
+        last: Optional[dt.date] = self.last_date(username)
+        if last is None:
+            payload: dict = contributions.get_history(
+                username) if history else contributions.get_query(username)
+            if "error" in payload or not (payload.get("data") or {}).get("user"):
+                return payload
+            self.upsert(username, payload)
+            if history:
+                self.mark_history(username)
+            return self.to_payload(username, days)
+
+        windows: list[tuple[dt.datetime, dt.datetime]] = year_windows(dt.datetime.combine(
+            last - dt.timedelta(days=self.overlap_days), dt.time()), dt.datetime.now())
+        if backfill:
+            windows += year_windows(self.created_at(username), dt.datetime.combine(self.first_date(username), dt.time()))
+        for window in windows:
+            payload = contributions.get_query(username, *window)
+            if "error" in payload or not (payload.get("data") or {}).get("user"):
+                return payload
+            self.upsert(username, payload)
+        if backfill:
+            self.mark_history(username)
+        return self.to_payload(username, days)
@@ -1,6 +1,8 @@
 import unittest
 import json
-from api import app, VERSION
+from unittest import mock
+import api
+from api import app, VERSION, training_pool
 
 
 class TestApi(unittest.TestCase):
@@ -41,6 +43,107 @@ class TestApi(unittest.TestCase):
             self.assertEqual(result['api_version'], VERSION)
             self.assertIsInstance(result, dict)
 
+    def test_metrics(self):
+        self.server.get(f"/{VERSION}/{self.test_username}/contributions/day/most")
+        response = self.server.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith("text/plain; version=0.0.4"))
+        body = response.data.decode()
+        self.assertIn("# TYPE api_request_seconds histogram", body)
+        self.assertIn('api_day_query_seconds_count{kind="most"}', body)
+        self.assertIn('route="/v1/<string:username>/contributions/day/<string:kind>",status="200"', body)
+        self.assertIn("statistics_build_seconds_count", body)
+
+    def test_cohort(self):
+        response = self.server.post(f"/{VERSION}/cohort", json={
+            "usernames": [self.test_username, "octocat"], "metrics": ["most", "weekday"], "rank_by": "saturday"})
+        self.assertEqual(response.status_code, 200)
+        result = response.get_json()["response"]
+        self.assertEqual([u["username"] for u in result["users"]], [self.test_username, "octocat"])
+        self.assertEqual(set(result["users"][0]["response"]), {"most", "weekday"})
+        self.assertEqual(result["rank_by"], "Saturday")
+        self.assertEqual([u["rank"] for u in result["users"]], [1, 1])
+        single = self.server.get(f"/{VERSION}/{self.test_username}/contributions/day/weekday").get_json()
+        self.assertEqual(result["users"][0]["response"]["weekday"]["contribution"],
+                         single["response"]["contribution"])
+        self.assertEqual(self.server.post(f"/{VERSION}/cohort", json={
+            "usernames": [self.test_username], "rank_by": "busiest"}).status_code, 400)
+
+    def test_cohort_all_failed(self):
+        with mock.patch.object(api, "get_data", return_value={"error": "user not found"}):
+            for rank_by in ("total", "monday"):
+                response = self.server.post(f"/{VERSION}/cohort", json={
+                    "usernames": ["ghost", "nobody"], "rank_by": rank_by})
+                self.assertEqual(response.status_code, 200)
+                result = response.get_json()["response"]
+                self.assertEqual(result["users"], [])
+                self.assertEqual(result["top"], [])
+                self.assertEqual([e["username"] for e in result["errors"]], ["ghost", "nobody"])
+
+    def test_cohort_empty_calendar(self):
+        empty = {"data": {"user": {"createdAt": "2019-03-02T10:00:00Z", "contributionsCollection": {
+            "contributionCalendar": {"totalContributions": 0, "weeks": []}}}}}
+        get_data = api.get_data
+        with mock.patch.object(api, "get_data", side_effect=lambda u: empty if u == "quiet" else get_data(u)):
+            response = self.server.post(f"/{VERSION}/cohort", json={
+                "usernames": ["quiet", self.test_username]})
+        result = response.get_json()["response"]
+        self.assertEqual([u["username"] for u in result["users"]], [self.test_username])
+        self.assertEqual(result["errors"], [{"username": "quiet", "error": "no contributions in range"}])
+
+    def test_predictions(self):
+        """
+        test endpoint: "/latest/<string:username>/predict/<string:kind>
+        """
+        for kind in ("next", "week", "month", "year"):
+            url = f"/{VERSION}/{self.test_username}/predict/{kind}"
+            first = self.server.get(url)
+            self.assertIn(first.status_code, (200, 202))
+            self.assertEqual(self.server.get(url).get_json()["response"]["job"],
+                             first.get_json()["response"]["job"])
+            training_pool.wait(f"{self.test_username}:{kind}", timeout=60)
+            response = self.server.get(url)
+            self.assertEqual(response.status_code, 200)
+            result = response.get_json()["response"]
+            self.assertEqual(result["status"], "done")
+            self.assertNotIn("error", result["result"])
+
+    def test_batch(self):
+        usernames = ["emylincon", "octocat", "torvalds"]
+        response = self.server.post(f"/{VERSION}/batch",
+                                    json={"usernames": usernames, "metrics": ["most", "weekday"]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "application/x-ndjson")
+        lines = [json.loads(line) for line in response.data.decode('utf-8').splitlines()]
+        self.assertEqual(sorted(line["username"] for line in lines), sorted(usernames))
+        for line in lines:
+            self.assertEqual(set(line["response"]), {"most", "weekday"})
+            self.assertIn("weekday", line["response"]["weekday"])
+
+    def test_batch_invalid(self):
+        response = self.server.post("/latest/batch", json={"usernames": "emylincon"})
+        self.assertEqual(response.status_code, 400)
+        for metrics in ("most", 5, ["most", "busiest"], [1]):
+            response = self.server.post("/latest/batch", json={"usernames": ["emylincon"], "metrics": metrics})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("error", response.get_json()["response"])
+
+    def test_predictions_failure_not_cached(self):
+        url = f"/{VERSION}/flaky/predict/next"
+        with mock.patch.object(api, "get_data", return_value={"error": "upstream unavailable"}):
+            self.assertEqual(self.server.get(url).status_code, 202)
+            training_pool.wait("flaky:next", timeout=60)
+            result = self.server.get(url).get_json()["response"]
+            self.assertEqual((result["status"], result["error"]), ("error", "upstream unavailable"))
+        # the next request starts a new run instead of serving the failure for result_ttl
+        self.assertEqual(self.server.get(url).status_code, 202)
+        training_pool.wait("flaky:next", timeout=60)
+        self.assertEqual(self.server.get(url).get_json()["response"]["status"], "done")
+
+    def test_predictions_unsupported(self):
+        result = self.server.get(f"/{VERSION}/{self.test_username}/predict/decade").get_json()
+        self.assertIn("error", result["response"])
+
     def test_contributions(self):
         """
         test endpoint: "/latest/<string:username>/contributions/day/<string:kind>
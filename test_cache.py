@@ -0,0 +1,87 @@
+import unittest
+import os
+import time
+import tempfile
+import datetime as dt
+from cache import Cache, MemoryCache, SQLiteCache, cache_key
+from github import Contributions
+
+
+class TestMemoryCache(unittest.TestCase):
+    def setUp(self):
+        """:arg
+        this runs before each test
+        """
+        self.cache = MemoryCache(ttl=60, max_size=2)
+
+    def test_hit_miss(self):
+        self.assertIsNone(self.cache.get("a"))
+        self.cache.set("a", {"value": 1})
+        self.assertEqual(self.cache.get("a"), {"value": 1})
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+    def test_lru_eviction(self):
+        self.cache.set("a", 1)
+        self.cache.set("b", 2)
+        self.cache.get("a")
+        self.cache.set("c", 3)
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(self.cache.get("a"), 1)
+        self.assertEqual(len(self.cache), 2)
+
+    def test_ttl(self):
+        self.cache.set("a", 1, ttl=-1)
+        self.assertIsNone(self.cache.get("a"))
+
+    def test_incomplete_backend(self):
+        class Partial(Cache):
+            def _get(self, key):
+                return None
+        with self.assertRaises(TypeError):
+            Partial()
+
+
+class TestSQLiteCache(unittest.TestCase):
+    def setUp(self):
+        """:arg
+        this runs before each test
+        """
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache.sqlite")
+
+    def tearDown(self):
+        """:arg
+        this runs after each test
+        """
+        self.tmp.cleanup()
+
+    def test_persists(self):
+        SQLiteCache(self.path).set("a", {"value": [1, 2]})
+        self.assertEqual(SQLiteCache(self.path).get("a"), {"value": [1, 2]})
+
+    def test_lru_eviction(self):
+        cache = SQLiteCache(self.path, max_size=2)
+        cache.set("a", 1)
+        time.sleep(0.01)
+        cache.set("b", 2)
+        time.sleep(0.01)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(len(cache), 2)
+
+
+class TestContributionsCache(unittest.TestCase):
+    def test_get_query_uses_cache(self):
+        cache = MemoryCache()
+        end = dt.datetime(2022, 5, 30)
+        start = end - dt.timedelta(days=365)
+        con = Contributions(cache=cache)
+        cache.set(cache_key("emylincon", start, end, con.query_builder.key), {"data": "cached"})
+        self.assertEqual(con.get_query("EmyLincon", end_date=end), {"data": "cached"})
+        self.assertEqual(cache.hits, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+import os
+import tempfile
+import datetime as dt
+import numpy as np
+from calendar_archive import CalendarArchive
+from contribution_calendar import ContributionCalendar
+from github import Statistics, PredictTotalMonth
+from store import ContributionStore
+from test_file import make_payload
+
+
+class TestCalendarArchive(unittest.TestCase):
+    def setUp(self):
+        """:arg
+        this runs before each test
+        """
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "archive")
+        self.payloads = {
+            "emylincon": make_payload(dt.date(2020, 1, 5), dt.date(2022, 5, 30)),
+            "octocat": make_payload(dt.date(2021, 5, 30), dt.date(2022, 5, 30)),
+        }
+        self.archive = CalendarArchive.write(self.path, {
+            username: ContributionCalendar.from_payload(payload) for username, payload in self.payloads.items()})
+
+    def tearDown(self):
+        """:arg
+        this runs after each test
+        """
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        reopened = CalendarArchive(self.path)
+        self.assertEqual(reopened.usernames(), ["emylincon", "octocat"])
+        self.assertIn("OctoCat", reopened)
+        self.assertEqual(reopened.dtype, np.int16)
+        calendar = reopened.get("emylincon")
+        expected = ContributionCalendar.from_payload(self.payloads["emylincon"])
+        self.assertEqual(calendar.start, expected.start)
+        self.assertEqual(calendar.counts.tolist(), expected.counts.tolist())
+        self.assertEqual(reopened.stats()["bytes"], 2 * reopened.stats()["days"])
+        with self.assertRaises(KeyError):
+            reopened.get("ghost")
+
+    def test_zero_copy_views(self):
+        calendar = self.archive.get("octocat")
+        self.assertTrue(np.shares_memory(calendar.counts, self.archive.counts))
+        window = self.archive.window("emylincon", dt.date(2021, 1, 1), dt.date(2021, 12, 31))
+        self.assertTrue(np.shares_memory(window.counts, self.archive.counts))
+        self.assertEqual(len(window), 365)
+        self.assertEqual(window.dates[0], np.datetime64("2021-01-01"))
+
+    def test_statistics_and_models(self):
+        calendar = self.archive.get("emylincon")
+        payload = self.payloads["emylincon"]
+        self.assertEqual(Statistics.from_calendar(calendar).most_month_contributions().name,
+                         Statistics(payload).most_month_contributions().name)
+        self.assertEqual(PredictTotalMonth(calendar).data_prep(), PredictTotalMonth(payload).data_prep())
+
+    def test_export_store(self):
+        store = ContributionStore(os.path.join(self.tmp.name, "store.sqlite"))
+        store.upsert("Emylincon", self.payloads["emylincon"])
+        archive = store.export(os.path.join(self.tmp.name, "exported"))
+        self.assertEqual(archive.usernames(), ["emylincon"])
+        self.assertEqual(archive.get("emylincon").counts.tolist(), self.archive.get("emylincon").counts.tolist())
+
+
+if __name__ == "__main__":
+    unittest.main()
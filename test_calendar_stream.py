@@ -0,0 +1,109 @@
+import unittest
+import json
+import datetime as dt
+import numpy as np
+import pandas as pd
+from calendar_stream import CalendarStreamParser, parse_chunks
+from contribution_calendar import ContributionCalendar
+from fake_github import FakeGitHub, FakeGitHubServer
+from github import Contributions, Statistics
+from ratelimit import TokenPool
+from test_file import make_payload
+
+
+def chunked(body: bytes, size: int) -> list[bytes]:
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+class TestCalendarStreamParser(unittest.TestCase):
+    def setUp(self):
+        """:arg
+        this runs before each test
+        """
+        self.payload = make_payload(dt.date(2021, 5, 30), dt.date(2022, 5, 30))
+        self.payload["data"]["rateLimit"] = {"remaining": 4999, "resetAt": "2022-05-30T01:00:00Z"}
+        self.body = json.dumps(self.payload, indent=1).encode()
+        self.expected = ContributionCalendar.from_payload(self.payload)
+
+    def test_chunk_sizes(self):
+        for size in (1, 7, 64, 4096, len(self.body)):
+            payload, calendar = parse_chunks(chunked(self.body, size))
+            np.testing.assert_array_equal(calendar.ordinals, self.expected.ordinals)
+            np.testing.assert_array_equal(calendar.counts, self.expected.counts)
+            self.assertEqual(calendar.counts.dtype, np.int16)
+            self.assertEqual(payload["data"]["rateLimit"]["remaining"], 4999)
+            collection = payload["data"]["user"]["contributionsCollection"]["contributionCalendar"]
+            self.assertEqual(collection["weeks"], [])
+            self.assertEqual(collection["totalContributions"], int(self.expected.counts.sum()))
+
+    def test_statistics(self):
+        _, calendar = parse_chunks(chunked(self.body, 100))
+        pd.testing.assert_frame_equal(Statistics.from_calendar(calendar).tf_data,
+                                      Statistics(self.payload).tf_data, check_dtype=False)
+
+    def test_error_body(self):
+        payload, calendar = parse_chunks([b'{"message": "Bad ', b'credentials"}'])
+        self.assertIsNone(calendar)
+        self.assertEqual(payload, {"message": "Bad credentials"})
+
+    def test_truncated(self):
+        parser = CalendarStreamParser()
+        parser.feed(self.body[:len(self.body) // 2])
+        with self.assertRaises(ValueError):
+            parser.close()
+        with self.assertRaises(ValueError):
+            parse_chunks([b"x" * 64], max_head=32)
+
+
+class TestGetCalendar(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """:arg
+        this runs once at the start of test
+        """
+        cls.server = FakeGitHubServer(FakeGitHub(not_found=["ghost"])).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        """:arg
+        this runs once after all test is completed
+        """
+        cls.server.stop()
+
+    def setUp(self):
+        """:arg
+        this runs before each test
+        """
+        self.server.github.error_rate = 0
+        self.con = Contributions(url=self.server.url, backoff=0, max_retries=1)
+        self.con.tokens = TokenPool(["token-a"], max_wait=0)
+        self.end = dt.datetime(2022, 5, 30)
+
+    def test_matches_get_query(self):
+        payload, calendar = self.con.get_calendar("emylincon", end_date=self.end, chunk_size=512)
+        expected = ContributionCalendar.from_payload(self.con.get_query("emylincon", end_date=self.end))
+        np.testing.assert_array_equal(calendar.ordinals, expected.ordinals)
+        np.testing.assert_array_equal(calendar.counts, expected.counts)
+        self.assertIn("createdAt", payload["data"]["user"])
+
+    def test_history(self):
+        _, calendar = self.con.get_calendar_history("emylincon")
+        expected = ContributionCalendar.from_payload(self.con.get_history("emylincon"))
+        np.testing.assert_array_equal(calendar.ordinals, expected.ordinals)
+        np.testing.assert_array_equal(calendar.counts, expected.counts)
+
+    def test_errors(self):
+        payload, calendar = self.con.get_calendar("ghost")
+        self.assertIsNone(calendar)
+        self.assertEqual(payload["errors"][0]["type"], "NOT_FOUND")
+        history, calendar = self.con.get_calendar_history("ghost")
+        self.assertIsNone(calendar)
+        self.assertEqual(history["errors"], payload["errors"])
+        self.server.github.error_rate = 1
+        payload, calendar = self.con.get_calendar("emylincon")
+        self.assertIsNone(calendar)
+        self.assertIn("error", payload)
+
+
+if __name__ == "__main__":
+    unittest.main()
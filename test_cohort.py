@@ -0,0 +1,63 @@
+import unittest
+import datetime as dt
+import numpy as np
+from cohort import Cohort, check_metric
+from github import Statistics
+from test_file import make_payload
+
+
+class TestCohort(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """:arg
+        this runs once at the start of test
+        """
+        cls.payloads = {
+            "emylincon": make_payload(dt.date(2021, 5, 30), dt.date(2022, 5, 30)),
+            "octocat": make_payload(dt.date(2020, 1, 1), dt.date(2021, 3, 3)),
+            "newcomer": make_payload(dt.date(2022, 4, 20), dt.date(2022, 5, 30)),
+        }
+        cls.cohort = Cohort.from_payloads(cls.payloads)
+
+    def test_matches_statistics(self):
+        summary = {row["username"]: row["response"] for row in self.cohort.summary()}
+        for i, (username, payload) in enumerate(self.payloads.items()):
+            stat_obj = Statistics(payload)
+            response = summary[username]
+            most = stat_obj.most_contribution_day()
+            self.assertEqual(response["most"]["most_contribution"], int(most.contribution.max()))
+            self.assertEqual(response["most"]["dates"], [d.to_pydatetime() for d in most.date])
+            self.assertEqual(response["least"]["total_days"], len(stat_obj.least_contribution_day()))
+            self.assertEqual(response["average"]["average_day_contribution"], round(stat_obj.avg_contribution_day()))
+            self.assertEqual(response["weekday"]["contribution"], int(stat_obj.most_weekday_contributions().contribution))
+            self.assertEqual(response["month"]["contribution"], int(stat_obj.most_month_contributions().contribution))
+            self.assertEqual(self.cohort.total()[i], stat_obj.total_contributions)
+            self.assertEqual(self.cohort.per_week()[i], stat_obj.average_contribution_per_week())
+            self.assertEqual(self.cohort.month_totals()[i].sum(), stat_obj.total_contributions)
+            self.assertEqual(sorted(self.cohort.week_totals()[i][self.cohort.week_totals()[i] > 0].tolist()),
+                             sorted(stat_obj.week_contributions().contribution[lambda c: c > 0].tolist()))
+
+    def test_rank_and_percentile(self):
+        total = self.cohort.total()
+        self.assertEqual(self.cohort.rank("total").tolist(), (len(total) - np.argsort(np.argsort(total))).tolist())
+        self.assertEqual(self.cohort.percentile("total").max(), 100)
+        self.assertEqual(self.cohort.top("total", 0.1), [self.cohort.usernames[int(np.argmax(total))]])
+        self.assertEqual(self.cohort.metric("saturday").shape, (3,))
+        self.assertIn("p50", self.cohort.quantiles("average"))
+
+    def test_unknown_metric(self):
+        self.assertEqual(check_metric("march"), "March")
+        with self.assertRaises(ValueError):
+            self.cohort.metric("busiest")
+
+    def test_empty(self):
+        empty = Cohort({})
+        self.assertEqual(empty.summary(), [])
+        self.assertEqual(empty.week_totals().shape, (0, 0))
+        for name in ("total", "monday", "march"):
+            self.assertEqual(empty.rank(name).tolist(), [])
+            self.assertEqual(empty.top(name), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
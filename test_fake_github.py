@@ -0,0 +1,108 @@
+import unittest
+import datetime as dt
+from fake_github import FakeGitHub, FakeGitHubServer, requested_fields
+from github import Contributions, Statistics
+from query import FULL_QUERY, STATS_QUERY
+from ratelimit import TokenPool
+from session import is_rate_limited
+
+
+class TestFakeGitHub(unittest.TestCase):
+    def setUp(self):
+        """:arg
+        this runs before each test
+        """
+        self.github = FakeGitHub(seed=1, not_found=["ghost"])
+        self.end = dt.datetime(2022, 5, 30)
+        self.start = self.end - dt.timedelta(days=365)
+
+    def respond(self, username, start, end, builder=FULL_QUERY):
+        return self.github.respond(builder.build(username, start, end), "token")
+
+    def test_requested_fields(self):
+        fields = requested_fields(STATS_QUERY.query)
+        self.assertEqual(fields["day"], ("date", "contributionCount"))
+        self.assertEqual(fields["user"], ("createdAt",))
+        self.assertEqual(fields["month"], ())
+        self.assertEqual(requested_fields(FULL_QUERY.query)["month"], FULL_QUERY.month_fields)
+
+    def test_deterministic_across_windows(self):
+        _, _, first = self.respond("emylincon", self.start, self.end)
+        _, _, shifted = self.respond("EmyLincon", self.start + dt.timedelta(days=30), self.end + dt.timedelta(days=30))
+
+        def days(payload):
+            weeks = payload["data"]["user"]["contributionsCollection"]["contributionCalendar"]["weeks"]
+            return {d["date"]: d["contributionCount"] for w in weeks for d in w["contributionDays"]}
+        first_days, shifted_days = days(first), days(shifted)
+        self.assertEqual(len(first_days), 366)
+        overlap = set(first_days) & set(shifted_days)
+        self.assertEqual(len(overlap), 336)
+        self.assertTrue(all(first_days[d] == shifted_days[d] for d in overlap))
+        self.assertNotEqual(days(self.respond("someone-else", self.start, self.end)[2]), first_days)
+
+    def test_query_shape(self):
+        status, headers, body = self.respond("emylincon", self.start, self.end, STATS_QUERY)
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["X-RateLimit-Remaining"], "4999")
+        user = body["data"]["user"]
+        self.assertEqual(set(user), {"createdAt", "contributionsCollection"})
+        weeks = user["contributionsCollection"]["contributionCalendar"]["weeks"]
+        self.assertEqual(set(weeks[0]["contributionDays"][0]), {"date", "contributionCount"})
+        self.assertTrue(all(len(w["contributionDays"]) == 7 for w in weeks[1:-1]))
+        self.assertIn("rateLimit", body["data"])
+
+    def test_errors(self):
+        _, _, body = self.respond("ghost", self.start, self.end)
+        self.assertIsNone(body["data"]["user"])
+        self.assertEqual(body["errors"][0]["type"], "NOT_FOUND")
+        _, _, body = self.respond("emylincon", self.end - dt.timedelta(days=800), self.end)
+        self.assertIn("errors", body)
+        self.github.error_rate = 1
+        self.assertEqual(self.respond("emylincon", self.start, self.end)[0], 502)
+
+
+class TestFakeGitHubServer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """:arg
+        this runs once at the start of test
+        """
+        cls.server = FakeGitHubServer(FakeGitHub(rate_limit=3, window=60)).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        """:arg
+        this runs once after all test is completed
+        """
+        cls.server.stop()
+
+    def setUp(self):
+        """:arg
+        this runs before each test
+        """
+        self.server.github.budgets.clear()
+        self.server.github.error_rate = 0
+        self.con = Contributions(url=self.server.url, backoff=0, max_retries=1)
+        self.con.tokens = TokenPool(["token-a"], max_wait=0)
+
+    def test_statistics_from_fake(self):
+        data = self.con.get_query("emylincon", end_date=dt.datetime(2022, 5, 30))
+        self.assertEqual(len(Statistics(data).tf_data), 366)
+
+    def test_rate_limit(self):
+        for i in range(3):
+            self.assertIn("data", self.con.get_query(f"user{i}"))
+        response = self.con.session.post(self.server.url, json=STATS_QUERY.build(
+            "user3", dt.datetime(2021, 5, 30), dt.datetime(2022, 5, 30)), headers={"Authorization": "bearer token-a"})
+        self.assertTrue(is_rate_limited(response))
+        self.assertIn("error", self.con.get_query("user4"))
+
+    def test_server_errors_are_retried(self):
+        self.server.github.error_rate = 1
+        before = self.server.github.stats()["errors"]
+        self.assertIn("error", self.con.get_query("emylincon"))
+        self.assertEqual(self.server.github.stats()["errors"] - before, self.con.max_retries + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
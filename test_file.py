@@ -1,9 +1,26 @@
 import unittest
 import json
-from numpy import int64
+import numpy as np
 from Regression import BestModel
 import datetime
-from github import Contributions, Statistics, PredictNext, PredictTotalWeek, PredictTotalMonth, PredictTotalYear
+from github import Contributions, Statistics, PredictNext, PredictTotalWeek, PredictTotalMonth, PredictTotalYear, \
+    year_windows, merge_calendars
+from contribution_calendar import ContributionCalendar
+from query import QueryBuilder, STATS_QUERY
+
+
+def make_payload(start: datetime.date, end: datetime.date, created: str = "2019-03-02T10:00:00Z") -> dict:
+    weeks = []
+    for i in range((end - start).days + 1):
+        date = start + datetime.timedelta(days=i)
+        weekday = (date.weekday() + 1) % 7
+        if weekday == 0 or not weeks:
+            weeks.append({"contributionDays": []})
+        weeks[-1]["contributionDays"].append(
+            {"weekday": weekday, "date": date.isoformat(), "contributionCount": date.day % 3, "color": ""})
+    total = sum(d["contributionCount"] for w in weeks for d in w["contributionDays"])
+    return {"data": {"user": {"email": "", "createdAt": created, "contributionsCollection": {
+        "contributionCalendar": {"totalContributions": total, "weeks": weeks, "months": []}}}}}
 
 
 class TestBasic(unittest.TestCase):
@@ -41,6 +58,54 @@ class TestBasic(unittest.TestCase):
         result = p.predict((25,))[0]
         self.assertIsInstance(result, float)
 
+    def test_best_model_matches_linear_regression(self):
+        xi = tuple((m, d) for m in range(1, 13) for d in (1, 15))
+        yi = tuple((m * 7 + d * 3) % 11 for m, d in xi)
+        my_obj = BestModel(xi, yi, 8)
+        scores = [s for _, s in my_obj.scores()]
+        self.assertEqual(scores, [my_obj.get_model(d).score for d in range(2, 8)])
+        self.assertEqual(BestModel(xi, yi, 8).compute_best_model(n_jobs=4).degree,
+                         my_obj.compute_best_model().degree)
+
+    def test_predictor_cache_bounded(self):
+        xi = (5, 15, 25, 35, 45, 55)
+        yi = (5, 20, 14, 32, 22, 38)
+        p = BestModel(xi, yi).compute_best_model()
+        p.cache.max_size = 4
+        for i in range(10):
+            p.predict((i,))
+        p.predict((9,))
+        info = p.cache_info()
+        self.assertEqual((info["size"], info["hits"], info["misses"]), (4, 1, 10))
+
+    def test_predict_many(self):
+        xi = tuple((m, d) for m in range(1, 13) for d in (1, 15))
+        yi = tuple((m * 7 + d * 3) % 11 for m, d in xi)
+        p = BestModel(xi, yi, 5).compute_best_model()
+        batch = p.predict_many(np.array(xi[:6]))
+        single = [p.predict((row,))[0] for row in xi[:6]]
+        np.testing.assert_allclose(batch, single)
+
+    def test_best_model_patience(self):
+        xi = tuple(range(30))
+        yi = tuple(3 * i + 1 for i in xi)
+        scored = list(BestModel(xi, yi, 20).scores(patience=2))
+        self.assertEqual(len(scored), 3)
+
+    def test_best_model_parallel_patience(self):
+        xi = tuple(range(30))
+        yi = tuple(3 * i + 1 for i in xi)
+        solved = []
+
+        class Counting(BestModel):
+            def score_degree(self, design, degree):
+                solved.append(degree)
+                return super().score_degree(design, degree)
+        scored = list(Counting(xi, yi, 20).scores(n_jobs=2, patience=1))
+        self.assertEqual([d for d, _ in scored], [2, 3])
+        # the two yielded degrees plus at most the one submitted ahead, not all 18
+        self.assertLessEqual(len(solved), 3)
+
 
 class TestContribution(unittest.TestCase):
     @classmethod
@@ -74,6 +139,71 @@ class TestContribution(unittest.TestCase):
         self.assertIsInstance(data, (list, dict))
 
 
+class TestQueryBuilder(unittest.TestCase):
+    def test_projection(self):
+        self.assertNotIn("color", STATS_QUERY.query)
+        self.assertIn("contributionCount", STATS_QUERY.query)
+        self.assertNotEqual(STATS_QUERY.key, QueryBuilder().key)
+
+    def test_variables(self):
+        start = datetime.datetime(2021, 5, 30)
+        query = STATS_QUERY.build("emylincon", start, start + datetime.timedelta(days=365))
+        self.assertIs(query["query"], STATS_QUERY.query)
+        self.assertEqual(query["variables"], {"login": "emylincon", "from": "2021-05-30T00:00:00Z",
+                                              "to": "2022-05-30T00:00:00Z"})
+
+    def test_unknown_field(self):
+        with self.assertRaises(ValueError):
+            QueryBuilder(day_fields=("date", "contributionCount", "mood"))
+        with self.assertRaises(ValueError):
+            QueryBuilder(day_fields=("date",))
+
+
+class TestHistory(unittest.TestCase):
+    def test_year_windows(self):
+        start = datetime.datetime(2019, 3, 2)
+        end = datetime.datetime(2022, 5, 30)
+        windows = year_windows(start, end)
+        self.assertEqual(windows[0][1], end - datetime.timedelta(seconds=1))
+        self.assertEqual(windows[-1][0], start)
+        dates = []
+        for s, e in reversed(windows):
+            self.assertEqual(s.time(), datetime.time())
+            self.assertLess(e - s, datetime.timedelta(days=365))
+            dates += [s.date() + datetime.timedelta(days=i) for i in range((e.date() - s.date()).days + 1)]
+        # every date from start to the day before the (midnight) end, each in exactly one window
+        self.assertEqual(dates, [start.date() + datetime.timedelta(days=i) for i in range((end - start).days)])
+
+    def test_year_windows_time_of_day(self):
+        now = datetime.datetime(2022, 5, 30, 15, 30)
+        windows = year_windows(datetime.datetime(2020, 1, 1, 10), now)
+        self.assertEqual(windows[0], (datetime.datetime(2021, 5, 31), now))
+        self.assertEqual(windows[1], (datetime.datetime(2020, 5, 31), datetime.datetime(2021, 5, 30, 23, 59, 59)))
+        self.assertEqual(windows[-1][0], datetime.datetime(2020, 1, 1))
+
+    def test_merge_calendars(self):
+        first = make_payload(datetime.date(2021, 1, 1), datetime.date(2021, 6, 30))
+        second = make_payload(datetime.date(2021, 6, 1), datetime.date(2021, 12, 31))
+        merged = merge_calendars([second, first])
+        whole = make_payload(datetime.date(2021, 1, 1), datetime.date(2021, 12, 31))
+        calendar = merged["data"]["user"]["contributionsCollection"]["contributionCalendar"]
+        expected = whole["data"]["user"]["contributionsCollection"]["contributionCalendar"]
+        self.assertEqual(calendar["totalContributions"], expected["totalContributions"])
+        self.assertEqual(calendar["weeks"], expected["weeks"])
+        self.assertEqual(len(Statistics(merged).tf_data), 365)
+
+    def test_get_history(self):
+        con = Contributions()
+
+        def fake_query(username, start_date, end_date):
+            return make_payload(start_date.date(), end_date.date())
+        con.get_query = fake_query
+        history = con.get_history("emylincon")
+        stat_obj = Statistics(history)
+        self.assertEqual(stat_obj.tf_data.date.min(), datetime.datetime(2019, 3, 2))
+        self.assertTrue(stat_obj.tf_data.date.is_unique)
+
+
 class TestStatistics(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
@@ -116,6 +246,40 @@ class TestStatistics(unittest.TestCase):
         data = self.trans.avg_contribution_day()
         self.assertIsInstance(data, float)
 
+    def test_days_contribution_columns(self):
+        df = self.trans.tf_data
+        self.assertEqual(str(df.day.dtype), "category")
+        self.assertEqual(str(df.month.dtype), "category")
+        self.assertEqual(df.iloc[0].day, df.iloc[0].date.day_name())
+        self.assertEqual(df.iloc[-1].month, df.iloc[-1].date.month_name())
+
+    def test_weekday_contributions(self):
+        df = self.trans.weekday_contributions()
+        self.assertEqual(int(df.contribution.sum()),
+                         int(self.trans.tf_data.contribution.sum()))
+        self.assertEqual(df.iloc[0].contribution,
+                         self.trans.most_weekday_contributions().contribution)
+
+    def test_month_contributions(self):
+        df = self.trans.month_contributions()
+        self.assertLessEqual(len(df), 12)
+        self.assertEqual(df.iloc[-1].contribution,
+                         self.trans.least_month_contributions().contribution)
+
+    def test_aggregate_index_cached(self):
+        self.assertIs(self.trans.weekday_contributions(), self.trans.weekday_contributions())
+        self.assertIs(self.trans.month_contributions(), self.trans.index["month"])
+        self.assertEqual(int(self.trans.week_contributions().contribution.sum()),
+                         int(self.trans.tf_data.contribution.sum()))
+
+    def test_aggregate_index_invalidated(self):
+        trans = Statistics(make_payload(datetime.date(2021, 1, 1), datetime.date(2021, 1, 31)))
+        self.assertEqual(trans.most_month_contributions().name, "January")
+        trans.data = make_payload(datetime.date(2021, 3, 1), datetime.date(2021, 3, 31))
+        self.assertEqual(trans.most_month_contributions().name, "March")
+        trans.tf_data = trans.tf_data.iloc[:0]
+        self.assertEqual(len(trans.month_contributions()), 0)
+
     def test_average_contribution_per_month(self):
         result = self.trans.average_contribution_per_month()
         self.assertIsInstance(result, int)
@@ -125,6 +289,51 @@ class TestStatistics(unittest.TestCase):
         self.assertIsInstance(result, int)
 
 
+class TestCalendar(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """:arg
+        this runs once at the start of test
+        """
+        cls.payload = make_payload(datetime.date(2020, 12, 20), datetime.date(2022, 2, 10))
+        cls.cal = ContributionCalendar.from_payload(cls.payload)
+
+    def test_date_parts(self):
+        for i, date in enumerate(self.cal.dates.tolist()):
+            self.assertEqual(self.cal.ordinals[i], date.toordinal())
+            self.assertEqual(self.cal.month[i], date.month)
+            self.assertEqual(self.cal.day[i], date.day)
+            self.assertEqual(self.cal.iso_week[i], date.isocalendar()[1])
+            self.assertEqual(self.cal.week_of_month[i],
+                             PredictTotalWeek.week_of_month(date))
+
+    def test_models_share_calendar(self):
+        self.assertIs(ContributionCalendar.of(self.cal), self.cal)
+        self.assertIs(PredictTotalMonth(self.cal).calendar, PredictNext(self.cal).calendar)
+        self.assertIsInstance(PredictTotalYear(self.payload).monthModel.calendar, ContributionCalendar)
+
+    def test_compact(self):
+        self.assertFalse(hasattr(self.cal, "__dict__"))
+        self.assertTrue(self.cal.consecutive)
+        self.assertEqual(self.cal.counts.dtype, np.int16)
+        self.assertEqual(self.cal.start, datetime.date(2020, 12, 20).toordinal())
+        wide = ContributionCalendar(self.cal.dates[:2], np.array([1, 40000]))
+        self.assertEqual(wide.counts.dtype, np.int32)
+
+    def test_slice_shares_counts(self):
+        window = self.cal[10:20]
+        self.assertTrue(np.shares_memory(window.counts, self.cal.counts))
+        self.assertEqual(window.dates.tolist(), self.cal.dates[10:20].tolist())
+        self.assertEqual(window.week_of_month.tolist(), self.cal.week_of_month[10:20].tolist())
+
+    def test_gaps(self):
+        dates = np.array(["2022-01-01", "2022-01-03"], dtype="datetime64[D]")
+        gapped = ContributionCalendar(dates, np.array([2, 5]))
+        self.assertFalse(gapped.consecutive)
+        self.assertEqual(gapped.dates.tolist(), dates.tolist())
+        self.assertEqual(gapped.filled().counts.tolist(), [2, 0, 5])
+
+
 class TestML(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
@@ -173,6 +382,18 @@ class TestML(unittest.TestCase):
     def test_predict_year(self):
         result = self.mly.predict()
         self.assertIsInstance(result, dict)
+        expected = sum(self.mlm.predict_month(i)["totalPredictedContribution"] for i in range(1, 13))
+        self.assertEqual(result["totalPredictedContribution"], expected)
+
+    def test_forecast_months(self):
+        forecast = self.mlm.forecast_months(range(1, 13))
+        self.assertEqual(forecast, [self.mlm.predict_month(i) for i in range(1, 13)])
+
+    def test_forecast_weeks(self):
+        start = datetime.datetime(2022, 5, 30)
+        forecast = self.mlw.forecast_weeks(start, 8)
+        expected = [self.mlw.predict_week(start + datetime.timedelta(weeks=i)) for i in range(8)]
+        self.assertEqual(forecast, expected)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,56 @@
+import unittest
+import os
+import sys
+import json
+import subprocess
+
+# modules that only the prediction models need (scikit-learn loaded eagerly cost ~1.5 s of cold start)
+ML_MODULES: tuple[str, ...] = ("Regression", "sklearn", "scipy")
+# opt-in wall-clock check of a cold `import api`, in microseconds; runner dependent, so off by default
+IMPORT_BUDGET_US: str = os.getenv("IMPORT_BUDGET_US", "")
+
+
+def run_fresh(code: str, *args: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *args, "-c", code], capture_output=True, text=True, check=True,
+                          cwd=os.path.dirname(os.path.abspath(__file__)))
+
+
+def loaded_modules(module: str) -> list[str]:
+    """
+    sys.modules of a fresh interpreter after importing `module`
+    """
+    output: str = run_fresh(f"import sys, json, {module}; print(json.dumps(list(sys.modules)))").stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def import_time(module: str) -> int:
+    """
+    Cumulative `python -X importtime` microseconds of `module` in a fresh interpreter
+    """
+    for line in run_fresh(f"import {module}", "-X", "importtime").stderr.splitlines():
+        if line.startswith("import time:") and line.split("|")[-1].strip() == module:
+            return int(line.split("|")[1])
+    raise AssertionError(f"{module} not in the import time report")
+
+
+class TestColdStart(unittest.TestCase):
+    def test_api_does_not_import_ml_stack(self):
+        loaded = loaded_modules("api")
+        self.assertEqual([m for m in loaded if m.split(".")[0] in ML_MODULES], [])
+
+    @unittest.skipUnless(IMPORT_BUDGET_US, "set IMPORT_BUDGET_US to check the cold import time")
+    def test_api_import_budget(self):
+        best = min(import_time("api") for _ in range(3))
+        self.assertLess(best, int(IMPORT_BUDGET_US))
+
+    def test_lazy_sentinel(self):
+        import Regression
+        import github
+        self.assertIs(github.NONE_PREDICTOR, Regression.NONE_PREDICTOR)
+        self.assertIs(github.BestModel, Regression.BestModel)
+        with self.assertRaises(AttributeError):
+            github.missing
+
+
+if __name__ == "__main__":
+    unittest.main()
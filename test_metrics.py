@@ -0,0 +1,41 @@
+import unittest
+from metrics import MetricsRegistry
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        """:arg
+        this runs before each test
+        """
+        self.registry = MetricsRegistry()
+
+    def test_counter(self):
+        counter = self.registry.counter("lookups_total", "cache lookups", ("result",))
+        counter.inc(result="hit")
+        counter.inc(2, result="miss")
+        self.assertEqual(counter.value(result="miss"), 2)
+        self.assertIn('lookups_total{result="hit"} 1\n', self.registry.render())
+        with self.assertRaises(ValueError):
+            counter.inc(kind="hit")
+
+    def test_histogram(self):
+        histogram = self.registry.histogram("size_bytes", "sizes", buckets=(10, 100))
+        for value in (5, 10, 50, 500):
+            histogram.observe(value)
+        lines = self.registry.render().splitlines()
+        self.assertEqual(lines[:2], ["# HELP size_bytes sizes", "# TYPE size_bytes histogram"])
+        self.assertEqual(lines[2:], ['size_bytes_bucket{le="10"} 2', 'size_bytes_bucket{le="100"} 3',
+                                     'size_bytes_bucket{le="+Inf"} 4', "size_bytes_sum 565", "size_bytes_count 4"])
+        with histogram.time():
+            pass
+        self.assertEqual(histogram.count(), 5)
+
+    def test_gauge_and_escaping(self):
+        self.registry.gauge("hit_ratio", "ratio", ("cache",), lambda: {('a"b',): 0.5})
+        self.assertIn('hit_ratio{cache="a\\"b"} 0.5', self.registry.render())
+        with self.assertRaises(ValueError):
+            self.registry.counter("hit_ratio", "duplicate")
+
+
+if __name__ == "__main__":
+    unittest.main()
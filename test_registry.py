@@ -0,0 +1,56 @@
+import unittest
+import json
+import tempfile
+import datetime
+import numpy as np
+from registry import ModelRegistry
+from Regression import BestModel, Predictor
+from github import PredictTotalMonth, PredictTotalWeek
+
+
+class TestModelRegistry(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """:arg
+        this runs once at the start of test
+        """
+        with open("test/data.json") as file_tmp:
+            cls.data = json.load(file_tmp)
+
+    def setUp(self):
+        """:arg
+        this runs before each test
+        """
+        self.tmp = tempfile.TemporaryDirectory()
+        self.registry = ModelRegistry(self.tmp.name, max_entries=2)
+
+    def tearDown(self):
+        """:arg
+        this runs after each test
+        """
+        self.tmp.cleanup()
+
+    def test_predictor_round_trip(self):
+        p = BestModel((5, 15, 25, 35, 45, 55), (5, 20, 14, 32, 22, 38)).compute_best_model()
+        loaded = Predictor.from_dict(json.loads(json.dumps(p.to_dict())))
+        np.testing.assert_array_equal(loaded.predict((25, 30)), p.predict((25, 30)))
+        self.assertEqual(loaded.degree, p.degree)
+
+    def test_warm_start(self):
+        cold = PredictTotalMonth(self.data, registry=self.registry, username="emylincon")
+        warm = PredictTotalMonth(self.data, registry=self.registry, username="emylincon")
+        self.assertEqual(self.registry.hits, 1)
+        self.assertEqual(warm.forecast_months(), cold.forecast_months())
+
+    def test_eviction(self):
+        PredictTotalMonth(self.data, registry=self.registry, username="a")
+        PredictTotalWeek(self.data, registry=self.registry, username="a")
+        PredictTotalMonth(self.data, registry=self.registry, username="b")
+        self.assertEqual(self.registry.stats()["size"], 2)
+        start = datetime.datetime(2022, 5, 30)
+        PredictTotalWeek(self.data, registry=self.registry, username="a").forecast_weeks(start, 2)
+        self.assertEqual(self.registry.hits, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
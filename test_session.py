@@ -0,0 +1,256 @@
+import unittest
+import asyncio
+import json
+import time
+import threading
+import datetime as dt
+import requests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from session import parse_retry_after, retry_delay
+from ratelimit import TokenPool
+from github import Contributions
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    failures: int = 0
+    delay: float = 0
+    in_flight: int = 0
+    max_in_flight: int = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        login = body.get("variables", {}).get("login", "")
+        with FlakyHandler.lock:
+            FlakyHandler.in_flight += 1
+            FlakyHandler.max_in_flight = max(FlakyHandler.max_in_flight, FlakyHandler.in_flight)
+        time.sleep(FlakyHandler.delay * (20 if login.startswith("slow") else 1))
+        with FlakyHandler.lock:
+            FlakyHandler.in_flight -= 1
+        if FlakyHandler.failures > 0:
+            FlakyHandler.failures -= 1
+            body = b"bad gateway"
+            self.send_response(502)
+            self.send_header("Retry-After", "0")
+        elif login == "ghost":
+            body = json.dumps({"message": "Not Found"}).encode()
+            self.send_response(404)
+        else:
+            body = json.dumps({"data": {"user": {"login": login}}}).encode()
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestSession(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """:arg
+        this runs once at the start of test
+        """
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), FlakyHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        """:arg
+        this runs once after all test is completed
+        """
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        """:arg
+        this runs before each test
+        """
+        self.con = Contributions(backoff=0)
+        self.con.url = f"http://127.0.0.1:{self.server.server_port}/graphql"
+
+    def test_headerless_responses_do_not_spend_budget(self):
+        self.con.tokens = TokenPool(["token-a"], max_wait=0, limit=3)
+        for i in range(6):
+            self.assertIn("data", self.con.get_query(f"user{i}"))
+
+    def test_retry_on_bad_gateway(self):
+        FlakyHandler.failures = 2
+        result = self.con.get_query("emylincon", end_date=dt.datetime(2022, 5, 30))
+        self.assertEqual(result, {"data": {"user": {"login": "emylincon"}}})
+
+    def test_gives_up_after_max_retries(self):
+        FlakyHandler.failures = self.con.max_retries + 1
+        response = self.con.post({"query": ""})
+        self.assertEqual(response.status_code, 502)
+        FlakyHandler.failures = 0
+
+    def test_connection_reuse(self):
+        for _ in range(3):
+            self.con.post({"query": ""})
+        stats = self.con.connection_stats()
+        self.assertEqual(stats["requests"], 3)
+        self.assertEqual(stats["connections"], 1)
+
+    def test_retry_after(self):
+        self.assertEqual(parse_retry_after("3"), 3.0)
+        self.assertIsNone(parse_retry_after(None))
+        self.assertLessEqual(retry_delay(10, 0.5, max_delay=2), 2)
+
+    def test_malformed_retry_after(self):
+        self.assertIsNone(parse_retry_after("abc"))
+        self.assertIsNone(parse_retry_after("Mon, 99 Foo 2022"))
+        response = requests.Response()
+        response.headers["Retry-After"] = "abc"
+        self.assertLessEqual(retry_delay(0, 0.5, response), 0.5)
+
+
+class BudgetHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    limit: int = 4
+    window: float = 0.5
+    budgets: dict = {}
+    rejected: int = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        token = self.headers["Authorization"].split()[-1]
+        now = time.time()
+        with BudgetHandler.lock:
+            remaining, reset = BudgetHandler.budgets.get(token, (BudgetHandler.limit, now + BudgetHandler.window))
+            if reset <= now:
+                remaining, reset = BudgetHandler.limit, now + BudgetHandler.window
+            if remaining > 0:
+                remaining -= 1
+                status = 200
+            else:
+                BudgetHandler.rejected += 1
+                status = 403
+            BudgetHandler.budgets[token] = (remaining, reset)
+        body = json.dumps({"data": {"rateLimit": {"cost": 1, "remaining": remaining}, "user": {"login": token}}}
+                          if status == 200 else {"message": "API rate limit exceeded"}).encode()
+        self.send_response(status)
+        self.send_header("X-RateLimit-Limit", str(BudgetHandler.limit))
+        self.send_header("X-RateLimit-Remaining", str(remaining))
+        self.send_header("X-RateLimit-Reset", str(reset))
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestTokenPool(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """:arg
+        this runs once at the start of test
+        """
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), BudgetHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        """:arg
+        this runs once after all test is completed
+        """
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        """:arg
+        this runs before each test
+        """
+        BudgetHandler.budgets, BudgetHandler.rejected = {}, 0
+        self.con = Contributions(backoff=0)
+        self.con.url = f"http://127.0.0.1:{self.server.server_port}/graphql"
+        self.con.tokens = TokenPool(["token-a", "token-b"], max_wait=5, limit=BudgetHandler.limit)
+
+    def test_rotates_tokens_within_budget(self):
+        logins = [self.con.get_query(f"user{i}")["data"]["user"]["login"] for i in range(8)]
+        self.assertEqual(BudgetHandler.rejected, 0)
+        self.assertEqual(logins.count("token-a"), 4)
+        self.assertEqual(logins.count("token-b"), 4)
+
+    def test_waits_for_reset(self):
+        for i in range(8):
+            self.con.get_query(f"user{i}")
+        start = time.time()
+        result = self.con.get_query("user8")
+        self.assertIn("data", result)
+        self.assertGreater(time.time() - start, 0.1)
+        self.assertEqual(BudgetHandler.rejected, 0)
+
+    def test_gives_up_after_max_wait(self):
+        self.con.tokens.max_wait = 0
+        for i in range(8):
+            self.con.get_query(f"user{i}")
+        self.assertIn("error", self.con.get_query("user8"))
+
+
+class TestQueryMany(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """:arg
+        this runs once at the start of test
+        """
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), FlakyHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        """:arg
+        this runs once after all test is completed
+        """
+        cls.server.shutdown()
+        cls.server.server_close()
+        FlakyHandler.delay = 0
+
+    def setUp(self):
+        """:arg
+        this runs before each test
+        """
+        self.con = Contributions(backoff=0)
+        self.con.url = f"http://127.0.0.1:{self.server.server_port}/graphql"
+        FlakyHandler.delay = 0.02
+        FlakyHandler.max_in_flight = 0
+
+    def collect(self, usernames, concurrency):
+        async def run():
+            return [item async for item in self.con.get_query_many(usernames, concurrency=concurrency)]
+        return asyncio.run(run())
+
+    def test_results_and_bounded_concurrency(self):
+        usernames = [f"user{i}" for i in range(12)]
+        results = dict(self.collect(usernames, concurrency=3))
+        self.assertEqual(set(results), set(usernames))
+        self.assertEqual(results["user5"]["data"]["user"]["login"], "user5")
+        self.assertLessEqual(FlakyHandler.max_in_flight, 3)
+
+    def test_error_isolation(self):
+        results = dict(self.collect(["user1", "ghost", "user2"], concurrency=2))
+        self.assertIn("error", results["ghost"])
+        self.assertIn("data", results["user2"])
+
+    def test_early_exit_does_not_wait(self):
+        async def run():
+            stream = self.con.get_query_many(["fast", "slow"], concurrency=2)
+            first, _ = await stream.__anext__()
+            started = time.perf_counter()
+            await stream.aclose()
+            return first, time.perf_counter() - started
+        first, closing = asyncio.run(run())
+        self.assertEqual(first, "fast")
+        self.assertLess(closing, FlakyHandler.delay * 10)
+        # let the abandoned request finish before the next test counts requests in flight
+        deadline = time.time() + 5
+        while FlakyHandler.in_flight and time.time() < deadline:
+            time.sleep(0.01)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import os
+import tempfile
+import datetime as dt
+from github import Statistics
+from store import ContributionStore
+from test_file import make_payload
+
+
+class FakeContributions:
+    def __init__(self):
+        self.calls = []
+
+    def get_query(self, username, start_date=None, end_date=None):
+        end_date = end_date or dt.datetime.now()
+        start_date = start_date or end_date - dt.timedelta(days=365)
+        self.calls.append((start_date, end_date))
+        return make_payload(start_date.date(), end_date.date())
+
+
+class TestContributionStore(unittest.TestCase):
+    def setUp(self):
+        """:arg
+        this runs before each test
+        """
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = ContributionStore(os.path.join(self.tmp.name, "store.sqlite"), max_age=0)
+        self.con = FakeContributions()
+
+    def tearDown(self):
+        """:arg
+        this runs after each test
+        """
+        self.tmp.cleanup()
+
+    def test_first_sync_loads_year(self):
+        payload = self.store.sync(self.con, "emylincon")
+        self.assertEqual(len(self.con.calls), 1)
+        self.assertEqual(self.store.last_date("emylincon"), dt.date.today())
+        self.assertEqual(len(Statistics(payload).tf_data), 366)
+
+    def test_delta_sync(self):
+        self.store.sync(self.con, "emylincon")
+        self.store.sync(self.con, "EmyLincon")
+        start, end = self.con.calls[-1]
+        self.assertEqual(start.date(), dt.date.today() - dt.timedelta(days=self.store.overlap_days))
+        self.assertEqual(len(self.store.read("emylincon")[0]), 366)
+
+    def test_payload_is_trailing_year(self):
+        today = dt.date.today()
+        self.store.upsert("emylincon", make_payload(today - dt.timedelta(days=800), today - dt.timedelta(days=400)))
+        payload = self.store.sync(self.con, "emylincon")
+        self.assertEqual(len(Statistics(payload).tf_data), 366)
+        self.assertEqual(len(Statistics.from_store(self.store, "emylincon").tf_data), 366)
+        self.assertEqual(len(self.store.read("emylincon", days=None)[0]), 801)
+        self.assertEqual(len(Statistics.from_store(self.store, "emylincon", history=True).tf_data), 801)
+
+    def test_history_backfill(self):
+        self.store.max_age = 300
+        self.store.sync(self.con, "emylincon")
+        self.assertFalse(self.store.has_history("emylincon"))
+        history = self.store.sync(self.con, "emylincon", history=True)
+        created = dt.date(2019, 3, 2)
+        self.assertEqual(Statistics(history).tf_data.date.min().date(), created)
+        self.assertEqual(len(Statistics(history).tf_data), (dt.date.today() - created).days + 1)
+        self.assertTrue(self.store.has_history("emylincon"))
+        calls = len(self.con.calls)
+        self.store.sync(self.con, "emylincon", history=True)
+        self.assertEqual(len(self.con.calls), calls)
+
+    def test_max_age_serves_from_store(self):
+        self.store.max_age = 300
+        self.store.sync(self.con, "emylincon")
+        self.store.sync(self.con, "emylincon")
+        self.assertEqual(len(self.con.calls), 1)
+
+    def test_statistics_from_store(self):
+        payload = self.store.sync(self.con, "emylincon")
+        from_store = Statistics.from_store(self.store, "emylincon")
+        self.assertEqual(from_store.total_contributions, Statistics(payload).total_contributions)
+        self.assertEqual(from_store.most_weekday_contributions().name,
+                         Statistics(payload).most_weekday_contributions().name)
+
+
+if __name__ == "__main__":
+    unittest.main()
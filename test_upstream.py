@@ -0,0 +1,98 @@
+import unittest
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from upstream import SingleFlight, CircuitBreaker, UpstreamFetcher
+from fake_github import FakeGitHub, FakeGitHubServer
+from github import Contributions
+
+
+class FakeUpstream:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+        self.fail = False
+        self.lock = threading.Lock()
+
+    def __call__(self, username):
+        with self.lock:
+            self.calls += 1
+            calls = self.calls
+        time.sleep(self.delay)
+        if self.fail:
+            return {"error": "bad gateway"}
+        return {"data": {"user": username, "version": calls}}
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_coalesces_concurrent_calls(self):
+        flight = SingleFlight()
+        upstream = FakeUpstream(delay=0.1)
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            results = list(executor.map(lambda _: flight.do("emylincon", lambda: upstream("emylincon")), range(10)))
+        self.assertEqual(upstream.calls, 1)
+        self.assertTrue(all(r is results[0] for r in results))
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_and_half_opens(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+        self.assertFalse(breaker.allow())
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, "closed")
+
+
+class TestUpstreamFetcher(unittest.TestCase):
+    def test_stale_while_revalidate(self):
+        upstream = FakeUpstream()
+        fetcher = UpstreamFetcher(upstream, fresh_ttl=0)
+        first = fetcher.get("emylincon")
+        second = fetcher.get("emylincon")
+        self.assertIs(second, first)
+        fetcher.refresher.shutdown(wait=True)
+        self.assertEqual(upstream.calls, 2)
+        self.assertEqual(fetcher.last_good.get("emylincon")[1]["data"]["version"], 2)
+
+    def test_fresh_payload_not_refetched(self):
+        upstream = FakeUpstream()
+        fetcher = UpstreamFetcher(upstream, fresh_ttl=60)
+        fetcher.get("emylincon")
+        fetcher.get("EmyLincon")
+        self.assertEqual(upstream.calls, 1)
+
+    def test_circuit_open_serves_stale(self):
+        upstream = FakeUpstream()
+        fetcher = UpstreamFetcher(upstream, fresh_ttl=0, stale_while_revalidate=False,
+                                  breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60))
+        good = fetcher.get("emylincon")
+        upstream.fail = True
+        self.assertIn("error", fetcher.get("emylincon"))
+        self.assertIs(fetcher.get("emylincon"), good)
+        self.assertIn("error", fetcher.get("octocat"))
+        self.assertEqual(upstream.calls, 2)
+
+    def test_not_found_is_not_kept(self):
+        with FakeGitHubServer(FakeGitHub(not_found=["ghost"])) as server:
+            breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+            fetcher = UpstreamFetcher(Contributions(url=server.url).get_query, fresh_ttl=0,
+                                      stale_while_revalidate=False, breaker=breaker)
+            breaker.record_failure()
+            breaker.opened_at = time.monotonic() - 60
+            payload = fetcher.get("ghost")
+            self.assertEqual(payload["errors"][0]["type"], "NOT_FOUND")
+            self.assertIsNone(fetcher.last_good.get("ghost"))
+            self.assertEqual(breaker.state, "half-open")
+            self.assertEqual(breaker.failures, 1)
+            self.assertIn("user", fetcher.get("emylincon")["data"])
+            self.assertEqual(breaker.state, "closed")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+import time
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+from cache import MemoryCache
+
+
+class CircuitOpen(Exception):
+    pass
+
+
+class SingleFlight:
+    """
+    Concurrent calls for the same key share the result of one in-flight call
+    """
+
+    def __init__(self) -> None:
+        self.flights: dict[str, Future] = {}
+        self.lock: threading.Lock = threading.Lock()
+
+    def do(self, key: str, func: Callable[[], Any]) -> Any:
+        with self.lock:
+            future: Optional[Future] = self.flights.get(key)
+            leader: bool = future is None
+            if leader:
+                future = self.flights[key] = Future()
+        if not leader:
+            return future.result()
+        try:
+            future.set_result(func())
+        except BaseException as error:
+            future.set_exception(error)
+        finally:
+            with self.lock:
+                del self.flights[key]
+        return future.result()
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures; after `reset_timeout` seconds
+    one trial call is let through (half-open) and closes it again on success
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30) -> None:
+        self.failure_threshold: int = failure_threshold
+        self.reset_timeout: float = reset_timeout
+        self.failures: int = 0
+        self.opened_at: Optional[float] = None
+        self.trial: bool = False
+        self.lock: threading.Lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.reset_timeout else "open"
+
+    def allow(self) -> bool:
+        with self.lock:
+            state: str = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self.trial:
+                self.trial = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self.lock:
+            self.failures, self.opened_at, self.trial = 0, None, False
+
+    def release(self) -> None:
+        """
+        An answer that is neither a success nor an outage, e.g. an unknown user: a half-open
+        trial is given back without closing or reopening the circuit
+        """
+        with self.lock:
+            self.trial = False
+
+    def record_failure(self) -> None:
+        with self.lock:
+            self.failures += 1
+            if self.trial or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self.trial = False
+
+
+class UpstreamFetcher:
+    """
+    Coalesced, circuit-broken upstream fetches. Payloads younger than `fresh_ttl` are served
+    as is; with stale-while-revalidate, older ones (up to `stale_ttl`) are served immediately
+    while one background refresh runs.
+    """
+
+    def __init__(self, fetch: Callable[[str], dict], fresh_ttl: float = 300, stale_ttl: float = 86400,
+                 stale_while_revalidate: bool = True, breaker: Optional[CircuitBreaker] = None,
+                 max_size: int = 1024) -> None:
+        self.fetch: Callable[[str], dict] = fetch
+        self.fresh_ttl: float = fresh_ttl
+        self.stale_while_revalidate: bool = stale_while_revalidate
+        self.breaker: CircuitBreaker = breaker or CircuitBreaker()
+        self.flight: SingleFlight = SingleFlight()
+        self.last_good: MemoryCache = MemoryCache(
+            ttl=stale_ttl, max_size=max_size)
+        self.refresher: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=2, thread_name_prefix="revalidate")
+        self.refreshing: set[str] = set()
+        self.lock: threading.Lock = threading.Lock()
+
+    def get(self, username: str) -> dict:
+        key: str = username.lower()
+        entry: Optional[tuple[float, dict]] = self.last_good.get(key)
+        if entry is not None:
+            fetched_at, payload = entry
+            if time.time() - fetched_at < self.fresh_ttl:
+                return payload
+            if self.stale_while_revalidate:
+                self.revalidate(key, username)
+                return payload
+        try:
+            return self.flight.do(key, lambda: self.fetch_now(key, username))
+        except CircuitOpen as error:
+            if entry is not None:
+                return entry[1]
+            return {"error": str(error)}
+
+    def fetch_now(self, key: str, username: str) -> dict:
+        if not self.breaker.allow():
+            raise CircuitOpen("upstream unavailable: circuit open")
+        try:
+            payload: dict = self.fetch(username)
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        if "error" in payload:
+            self.breaker.record_failure()
+        elif not (payload.get("data") or {}).get("user"):
+            # GraphQL `errors` (unknown login, bad window): upstream answered, but nothing to keep
+            self.breaker.release()
+        else:
+            self.breaker.record_success()
+            self.last_good.set(key, (time.time(), payload))
+        return payload
+
+    def revalidate(self, key: str, username: str) -> None:
+        with self.lock:
+            if key in self.refreshing:
+                return
+            self.refreshing.add(key)
+
+        def refresh() -> None:
+            try:
+                self.flight.do(key, lambda: self.fetch_now(key, username))
+            except Exception:
+                pass
+            finally:
+                with self.lock:
+                    self.refreshing.discard(key)
+        self.refresher.submit(refresh)